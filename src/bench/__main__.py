@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from . import env
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Load test for the reminder bot against a fake Bot API server",
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--reminders", type=int, default=10_000)
+    parser.add_argument(
+        "--scenarios",
+        default="create,dialog,list,fire,delete",
+        type=lambda value: value.split(","),
+        help="comma separated: create, dialog, list, fire, delete",
+    )
+    parser.add_argument("--redis", choices=("fake", "real"), default="fake",
+                        help="fakeredis in process or the server from REDIS_* variables")
+    parser.add_argument("--flush", action="store_true",
+                        help="allow FLUSHDB on a non-empty real Redis database")
+    parser.add_argument("--encoding", choices=("hash", "packed"), default="hash",
+                        help="reminder record layout, compare redis_used_memory_mb")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="artificial Bot API latency, seconds")
+    parser.add_argument("--flood", type=float, default=0.0,
+                        help="share of sendMessage calls answered with 429")
+    parser.add_argument("--global-rate", type=float, default=1e6)
+    parser.add_argument("--chat-rate", type=float, default=1e6)
+    parser.add_argument("--json", help="write the report to this file")
+    return parser.parse_args()
+
+
+async def main(args):
+    from storage import redis_client
+    from .scenarios import SCENARIOS, run
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.redis == "real" and await redis_client.dbsize():
+        if not args.flush:
+            sys.exit("Redis database is not empty, pass --flush to wipe it")
+        await redis_client.flushdb()
+
+    rows = await run(args)
+
+    columns = list(rows[0]) if rows else []
+    print(" | ".join(columns))
+    for row in rows:
+        print(" | ".join(str(row[column]) for column in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    env.prepare(arguments)
+    asyncio.run(main(arguments))
@@ -0,0 +1,33 @@
+import os
+
+
+def prepare(args):
+    """Configures the process before any bot module is imported."""
+    os.environ.setdefault("BOT_KEY", "42:bench")
+    os.environ.setdefault("REDIS_HOST", "localhost")
+    os.environ.setdefault("REDIS_PORT", "6379")
+    os.environ.setdefault("REDIS_PASSWORD", "")
+    os.environ["FSM_STORAGE"] = "redis"
+    os.environ["REMINDER_ENCODING"] = args.encoding
+    os.environ["DELIVERY_GLOBAL_RATE"] = str(args.global_rate)
+    os.environ["DELIVERY_CHAT_RATE"] = str(args.chat_rate)
+    # бенчмарк создаёт сколько угодно напоминаний на пользователя
+    os.environ["MAX_REMINDERS_PER_USER"] = "0"
+
+    if args.redis == "fake":
+        use_fakeredis()
+
+
+def use_fakeredis():
+    import fakeredis
+    import redis.asyncio
+
+    server = fakeredis.FakeServer()
+
+    # все клиенты приложения создаются через redis.asyncio.Redis — подменяем его
+    def factory(*args, connection_pool=None, **kwargs):
+        if connection_pool is not None:
+            return fakeredis.aioredis.FakeRedis(connection_pool=connection_pool)
+        return fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+
+    redis.asyncio.Redis = factory
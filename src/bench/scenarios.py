@@ -0,0 +1,231 @@
+import asyncio
+import resource
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from aiogram import Dispatcher
+from aiogram.types import Update
+
+from bot import bot
+from bot.fsm import build_fsm_storage
+from bot.handlers.reminder import create_reminder, router
+from scheduler.base import scheduler
+from scheduler.delivery import delivery_queue
+from scheduler.dispatcher import dispatcher
+from scheduler.worker import DeliveryWorker
+from storage import redis_client, reminders
+from storage.repository import SCHEDULE_KEY
+from .telegram import FakeBotAPI
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+@dataclass
+class Result:
+    name: str
+    operations: int
+    seconds: float
+    latencies: list[float] = field(default_factory=list, repr=False)
+
+    def row(self) -> dict:
+        return {
+            "scenario": self.name,
+            "operations": self.operations,
+            "seconds": round(self.seconds, 3),
+            "ops_per_sec": round(self.operations / self.seconds, 1) if self.seconds else 0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+
+
+class Bench:
+    def __init__(self, api: FakeBotAPI, users: int, reminders_count: int, concurrency: int):
+        self.api = api
+        self.users = users
+        self.reminders_count = reminders_count
+        self.concurrency = concurrency
+        self.dp = Dispatcher(storage=build_fsm_storage())
+        self.dp.include_router(router)
+        self._update_id = 0
+
+    # ---------- helpers ----------
+
+    def _next_update_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def _message(self, user_id: int, text: str) -> dict:
+        return {
+            "message_id": self._next_update_id(),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+
+    def message_update(self, user_id: int, text: str) -> Update:
+        return Update.model_validate(
+            {"update_id": self._next_update_id(), "message": self._message(user_id, text)},
+            context={"bot": bot},
+        )
+
+    def callback_update(self, user_id: int, data: str) -> Update:
+        return Update.model_validate(
+            {
+                "update_id": self._next_update_id(),
+                "callback_query": {
+                    "id": str(self._update_id),
+                    "from": self._user(user_id),
+                    "chat_instance": str(user_id),
+                    "data": data,
+                    "message": self._message(user_id, "bench"),
+                },
+            },
+            context={"bot": bot},
+        )
+
+    async def _measure(self, name: str, calls) -> Result:
+        """Runs coroutine factories with bounded concurrency, timing each one."""
+        latencies = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def timed(call):
+            async with semaphore:
+                started = time.perf_counter()
+                await call()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(call) for call in calls))
+        return Result(name, len(latencies), time.perf_counter() - started, latencies)
+
+    def _user_ids(self):
+        return range(1, self.users + 1)
+
+    # ---------- scenarios ----------
+
+    async def create(self) -> Result:
+        run_at = datetime.now(scheduler.timezone).replace(hour=9, minute=0, second=0, microsecond=0)
+        run_at += timedelta(days=1)
+
+        def call(i):
+            return lambda: create_reminder(
+                user_id=i % self.users + 1,
+                text=f"Напоминание #{i}",
+                run_at=run_at,
+                repeat_type="daily",
+            )
+
+        return await self._measure("create", [call(i) for i in range(self.reminders_count)])
+
+    async def dialog(self) -> Result:
+        async def walk(user_id: int):
+            for update in (
+                self.message_update(user_id, "➕ Добавить напоминание"),
+                self.message_update(user_id, "Позвонить маме"),
+                self.callback_update(user_id, "repeat:daily"),
+                self.callback_update(user_id, "time:09:00"),
+            ):
+                await self.dp.feed_update(bot, update)
+
+        return await self._measure(
+            "dialog", [lambda u=user_id: walk(u) for user_id in self._user_ids()]
+        )
+
+    async def fire(self) -> Result:
+        # «все в 09:00»: переносим весь бакет на текущий момент
+        scheduled_at = time.time()
+        reminder_ids = []
+        cursor = 0
+        while True:
+            cursor, chunk = await redis_client.zscan(SCHEDULE_KEY, cursor, count=5000)
+            reminder_ids += [reminder_id for reminder_id, _ in chunk]
+            if not cursor:
+                break
+        for i in range(0, len(reminder_ids), 5000):
+            await redis_client.zadd(
+                SCHEDULE_KEY, {rid: scheduled_at for rid in reminder_ids[i:i + 5000]}
+            )
+
+        worker = DeliveryWorker("bench", batch_size=max(self.concurrency, 100))
+        await worker.setup()
+        already_sent = len(self.api.sent_at)
+
+        started = time.perf_counter()
+        await dispatcher.tick()
+        while await worker.run_once(block=False):
+            pass
+
+        lags = [sent_at - scheduled_at for sent_at in self.api.sent_at[already_sent:]]
+        return Result("fire", len(lags), time.perf_counter() - started, lags)
+
+    async def listing(self) -> Result:
+        return await self._measure(
+            "list",
+            [
+                lambda u=user_id: self.dp.feed_update(bot, self.message_update(u, "📋 Мои напоминания"))
+                for user_id in self._user_ids()
+            ],
+        )
+
+    async def deletion(self) -> Result:
+        calls = []
+        for user_id in self._user_ids():
+            for reminder_id in await reminders.user_reminder_ids(user_id):
+                update = self.callback_update(user_id, f"reminders:delete:0:{reminder_id}")
+                calls.append(lambda u=update: self.dp.feed_update(bot, u))
+        return await self._measure("delete", calls)
+
+    async def redis_memory(self) -> int | None:
+        try:
+            return (await redis_client.info("memory")).get("used_memory")
+        except Exception:
+            return None
+
+
+SCENARIOS = {
+    "create": Bench.create,
+    "dialog": Bench.dialog,
+    "fire": Bench.fire,
+    "list": Bench.listing,
+    "delete": Bench.deletion,
+}
+
+
+async def run(args) -> list[dict]:
+    api = FakeBotAPI(latency=args.latency, flood_ratio=args.flood)
+    base_url = await api.start()
+
+    from aiogram.client.telegram import TelegramAPIServer
+    bot.session.api = TelegramAPIServer.from_base(base_url)
+
+    delivery_queue.start()
+    bench = Bench(api, args.users, args.reminders, args.concurrency)
+
+    rows = []
+    try:
+        for name in args.scenarios:
+            result = await SCENARIOS[name](bench)
+            row = result.row()
+            row["redis_used_memory_mb"] = (
+                round(memory / 2 ** 20, 1)
+                if (memory := await bench.redis_memory()) is not None else None
+            )
+            row["api_calls"] = sum(api.calls.values())
+            rows.append(row)
+    finally:
+        await delivery_queue.stop()
+        await bot.session.close()
+        await api.stop()
+
+    return rows
@@ -0,0 +1,71 @@
+import asyncio
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+
+class FakeBotAPI:
+    """
+    Minimal Bot API server: answers every method with a plausible result and
+    records when each ``sendMessage`` arrived.
+    """
+
+    def __init__(self, latency: float = 0.0, flood_ratio: float = 0.0):
+        self.latency = latency
+        self.flood_ratio = flood_ratio
+        self.calls = Counter()
+        self.sent_at: list[float] = []
+        self._message_id = 0
+        self._runner: web.AppRunner | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        self.calls[method] += 1
+        payload = dict(await request.post()) if request.can_read_body else {}
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "sendmessage" and random.random() < self.flood_ratio:
+            return web.json_response(
+                {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                 "parameters": {"retry_after": 1}},
+                status=429,
+            )
+
+        if method in ("sendmessage", "editmessagetext"):
+            if method == "sendmessage":
+                self.sent_at.append(time.time())
+            return web.json_response({"ok": True, "result": self._message(payload)})
+
+        if method == "getme":
+            return web.json_response({"ok": True, "result": {
+                "id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot",
+            }})
+
+        return web.json_response({"ok": True, "result": True})
+
+    def _message(self, payload: dict) -> dict:
+        self._message_id += 1
+        chat_id = int(payload.get("chat_id", 0))
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": payload.get("text", ""),
+        }
@@ -1,6 +1,8 @@
 from aiogram import Bot
 
 from config import settings
+from metrics import TelegramMetricsMiddleware
 
 
 bot = Bot(token=settings.bot_key)
+bot.session.middleware(TelegramMetricsMiddleware())
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config import settings
+from metrics.base import updates_dropped, updates_pending
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChatExecutor:
+    """
+    Runs update handlers concurrently across chats and strictly in order
+    within a chat.
+
+    Every chat has a FIFO queue drained by one task, so the ``ReminderForm``
+    steps of a chat never overtake each other, and at most ``concurrency``
+    chats are handled at once. ``submit`` waits while ``max_pending`` updates
+    are queued, which holds back polling or the webhook response. A chat that
+    already has ``chat_limit`` queued updates gets further ones dropped.
+    """
+
+    def __init__(self, concurrency: int, max_pending: int, chat_limit: int):
+        self.chat_limit = chat_limit
+        self._slots = asyncio.Semaphore(concurrency)
+        self._capacity = asyncio.Semaphore(max_pending)
+        self._queues: dict[Any, deque[Callable[[], Awaitable]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, key: Any, job: Callable[[], Awaitable]) -> bool:
+        """Queues ``job`` behind earlier jobs of ``key``; returns ``False`` if it was dropped."""
+        if key is None:
+            # апдейты без чата ни с чем не упорядочиваем
+            key = object()
+
+        queue = self._queues.get(key)
+        if queue is not None and len(queue) >= self.chat_limit:
+            logger.warning("Chat %s has %d queued updates, dropping one", key, len(queue))
+            updates_dropped.inc()
+            return False
+
+        await self._capacity.acquire()
+        updates_pending.inc()
+        # пока ждали места, очередь чата могла опустеть и закрыться
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            task = asyncio.create_task(self._run(key, queue))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        queue.append(job)
+        return True
+
+    async def drain(self, timeout: float):
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    async def _run(self, key: Any, queue: deque):
+        try:
+            while queue:
+                async with self._slots:
+                    try:
+                        await queue[0]()
+                    except Exception:
+                        logger.exception("Update handler failed")
+                queue.popleft()
+                self._capacity.release()
+                updates_pending.dec()
+        finally:
+            del self._queues[key]
+
+
+class ChatExecutorMiddleware(BaseMiddleware):
+    """Outer update middleware that hands the rest of the pipeline to ``ChatExecutor``."""
+
+    def __init__(self, executor: ChatExecutor):
+        self.executor = executor
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else None
+        await self.executor.submit(key, lambda: handler(event, data))
+
+
+update_executor = ChatExecutor(
+    concurrency=settings.update_concurrency,
+    max_pending=settings.update_queue_size,
+    chat_limit=settings.update_chat_queue,
+)
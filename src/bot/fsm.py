@@ -0,0 +1,33 @@
+import json
+from functools import partial
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
+
+from config import settings
+from storage import redis_client
+
+
+# без пробелов и \u-экранирования: кириллица занимает 2 байта вместо 6
+compact_dumps = partial(json.dumps, separators=(",", ":"), ensure_ascii=False)
+
+
+class SharedPoolRedisStorage(RedisStorage):
+    async def close(self) -> None:
+        # пул общий со storage.redis_client, закрываем только клиента
+        await self.redis.aclose(close_connection_pool=False)
+
+
+def build_fsm_storage() -> BaseStorage:
+    if settings.fsm_storage == "memory":
+        return MemoryStorage()
+
+    return SharedPoolRedisStorage(
+        redis=Redis(connection_pool=redis_client.connection_pool),
+        key_builder=DefaultKeyBuilder(prefix="fsm"),
+        state_ttl=settings.fsm_state_ttl,
+        data_ttl=settings.fsm_data_ttl,
+        json_dumps=compact_dumps,
+    )
@@ -0,0 +1,90 @@
+import io
+
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+
+from bulk import ExportFile, FormatError, detect_format, import_reminders, parse
+from config import settings
+from storage import timezones
+from ..states.reminder import ImportForm
+
+
+router = Router()
+
+IMPORT_MAX_BYTES = 5 * 2 ** 20
+ERRORS_SHOWN = 10
+
+
+@router.message(Command("import"))
+async def import_start(message: Message, state: FSMContext):
+    await message.answer(
+        "📥 Пришли файл CSV, JSON или iCal (.ics).\n"
+        "CSV: колонки text, run_at, type, tz — например\n"
+        "<code>Позвонить маме,25.12.2026 09:00,yearly,</code>\n"
+        "type: once, daily, weekly, monthly, yearly; tz — по умолчанию твой часовой пояс",
+        parse_mode="HTML",
+    )
+    await state.set_state(ImportForm.file)
+
+
+@router.message(ImportForm.file, F.document, flags={"throttle": "import"})
+async def import_file(message: Message, state: FSMContext):
+    document = message.document
+    if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+        await message.answer("❌ Файл больше 5 МБ")
+        return
+
+    try:
+        fmt = detect_format(document.file_name or "")
+    except FormatError as e:
+        await message.answer(f"❌ {e}")
+        return
+
+    buffer = io.BytesIO()
+    await message.bot.download(document, destination=buffer)
+    tz = await timezones.get(message.from_user.id)
+
+    try:
+        result = await import_reminders(
+            message.from_user.id,
+            parse(buffer.getvalue(), fmt),
+            tz,
+            limit=settings.max_reminders_per_user,
+            bot=message.bot,
+        )
+    except FormatError as e:
+        await message.answer(f"❌ {e}")
+        return
+
+    await state.clear()
+    lines = [f"✅ Создано напоминаний: {result.created}"]
+    if result.errors:
+        lines.append(f"⚠️ Пропущено: {len(result.errors)}")
+        lines += result.errors[:ERRORS_SHOWN]
+        if len(result.errors) > ERRORS_SHOWN:
+            lines.append("…")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("cancel"))
+async def cancel(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Отменено")
+
+
+@router.message(ImportForm.file)
+async def import_not_a_file(message: Message):
+    await message.answer("📎 Жду файл документом. Передумал — /cancel")
+
+
+@router.message(Command("export"))
+async def export(message: Message, command: CommandObject):
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in ("csv", "json", "ics"):
+        await message.answer("Формат: /export csv, /export json или /export ics")
+        return
+
+    # файл собирается из Redis по мере отправки, целиком в памяти не держим
+    await message.answer_document(ExportFile(message.from_user.id, fmt))
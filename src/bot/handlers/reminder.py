@@ -1,21 +1,27 @@
-import uuid
+import asyncio
 from calendar import monthrange
 from datetime import datetime, timedelta
 
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
+from aiogram.types import InlineKeyboardMarkup
 from aiogram.types import Message
 from apscheduler.jobstores.base import JobLookupError
 
+from config import settings
 from scheduler.base import scheduler
-from scheduler.tasks import send_reminder
-from storage import redis_client
+from scheduler.fanout import foreign_recipients, parse_recipients
+from scheduler.triggers import build_reminder, reminder_timezone
+from storage import reminders, timezones
+from storage.timezones import parse_timezone
 from ..keyboards.menu import main_menu
-from ..keyboards.reminder import reminder_actions, edit_menu
+from ..keyboards.reminder import edit_menu, reminders_page_keyboard
 from ..keyboards.repeat import repeat_type_keyboard, weekday_keyboard, monthday_keyboard
 from ..keyboards.timepicker import time_picker_keyboard
-from ..states.reminder import ReminderForm, ReminderEditForm
+from ..keyboards.timezone import timezone_keyboard
+from ..states.reminder import ReminderForm, ReminderEditForm, TimezoneForm
 
 
 router = Router()
@@ -28,6 +34,11 @@ TYPE_MAP = {
     "yearly": "Каждый год",
 }
 
+PAGE_SIZE = 10
+TEXT_PREVIEW_LIMIT = 200
+
+LIMIT_TEXT = "❌ Достигнут лимит напоминаний: {limit}. Удали ненужные в «📋 Мои напоминания»"
+
 
 async def create_reminder(
     *,
@@ -35,98 +46,85 @@ async def create_reminder(
     text: str,
     run_at: datetime,
     repeat_type: str,
-):
-    reminder_id = str(uuid.uuid4())
-    job_id = f"reminder_{reminder_id}"
-
-    # 1️⃣ сохраняем в Redis
-    await redis_client.hset(
-        f"reminder:{reminder_id}",
-        mapping={
-            "user_id": user_id,
-            "text": text,
-            "run_at": run_at.isoformat(),
-            "type": repeat_type,
-            "status": "active",
-        }
+) -> str | None:
+    """Returns ``None`` if the user already has ``MAX_REMINDERS_PER_USER`` reminders."""
+    data, first_run = build_reminder(
+        user_id=user_id, text=text, run_at=run_at, repeat_type=repeat_type
     )
-    await redis_client.sadd(f"user:{user_id}:reminders", reminder_id)
-
-    # 2️⃣ создаём job
-    if repeat_type == "once":
-        scheduler.add_job(
-            send_reminder,
-            "date",
-            run_date=run_at,
-            args=(reminder_id,),
-            id=job_id,
-            replace_existing=True,
-        )
 
-    elif repeat_type == "daily":
-        scheduler.add_job(
-            send_reminder,
-            "interval",
-            days=1,
-            start_date=run_at,
-            args=(reminder_id,),
-            id=job_id,
-            replace_existing=True,
-        )
+    # хеш, индекс пользователя и расписание — одним скриптом, лимит проверяется там же
+    reminder_id = await reminders.create(
+        data, first_run.timestamp(), limit=settings.max_reminders_per_user
+    )
 
-    elif repeat_type == "weekly":
-        scheduler.add_job(
-            send_reminder,
-            "cron",
-            day_of_week=run_at.weekday(),
-            hour=run_at.hour,
-            minute=run_at.minute,
-            args=(reminder_id,),
-            id=job_id,
-            replace_existing=True,
-        )
+    return reminder_id
 
-    elif repeat_type == "monthly":
-        scheduler.add_job(
-            send_reminder,
-            "cron",
-            day=run_at.day,
-            hour=run_at.hour,
-            minute=run_at.minute,
-            args=(reminder_id,),
-            id=job_id,
-            replace_existing=True,
-        )
 
-    elif repeat_type == "yearly":
-        scheduler.add_job(
-            send_reminder,
-            "cron",
-            month=run_at.month,
-            day=run_at.day,
-            hour=run_at.hour,
-            minute=run_at.minute,
-            args=(reminder_id,),
-            id=job_id,
-            replace_existing=True,
-        )
+async def reschedule_reminder(
+    reminder_id: str,
+    *,
+    user_id: int,
+    run_at: datetime,
+    repeat_type: str,
+) -> bool:
+    """Moves an existing reminder to a new time and recurrence, keeping its id."""
+    data, first_run = build_reminder(
+        user_id=user_id, text="", run_at=run_at, repeat_type=repeat_type
+    )
+    # запись и расписание меняются одним скриптом; старые job'ы reminder_<uuid>
+    # диспетчер перенесёт с nx, новое время не перетрётся
+    return await reminders.reschedule(
+        reminder_id,
+        {field: data[field] for field in ("run_at", "type", "tz")},
+        first_run.timestamp(),
+    )
 
-    else:
-        raise ValueError(f"Unknown repeat_type: {repeat_type}")
 
-    return reminder_id
+async def save_form(*, user_id: int, run_at: datetime, state: FSMContext, send_answer):
+    """Creates the reminder collected by ``ReminderForm`` or reschedules the edited one."""
+    data = await state.get_data()
+    reminder_id = data.get("reschedule_id")
+
+    if reminder_id:
+        if await reschedule_reminder(
+            reminder_id, user_id=user_id, run_at=run_at, repeat_type=data["repeat_type"]
+        ):
+            await send_answer("✅ Время напоминания обновлено")
+        else:
+            await send_answer("❌ Напоминание не найдено.")
+    elif await create_reminder(
+        user_id=user_id,
+        text=data["text"],
+        run_at=run_at,
+        repeat_type=data["repeat_type"],
+    ):
+        await send_answer("✅ Напоминание сохранено!")
+    else:
+        await send_answer(LIMIT_TEXT.format(limit=settings.max_reminders_per_user))
+    await state.clear()
 
 
 @router.message(F.text == "/start")
 async def start(message: Message):
-    await message.answer(
-        "Привет! Я бот-напоминалка ⏰",
-        reply_markup=main_menu()
-    )
+    # напоминания выключаются, когда пользователь блокирует бота
+    restored = await reminders.set_user_status(message.from_user.id, "active", current="inactive")
+    text = "Привет! Я бот-напоминалка ⏰"
+    if restored:
+        text += f"\n\nСнова включил твои напоминания: {restored}"
 
+    await message.answer(text, reply_markup=main_menu())
 
-@router.message(F.text == "➕ Добавить напоминание")
+
+@router.message(F.text == "➕ Добавить напоминание", flags={"throttle": "create"})
 async def add_reminder(message: Message, state: FSMContext):
+    # не даём заполнять форму, которую всё равно не сохраним
+    limit = settings.max_reminders_per_user
+    if limit and await reminders.count(message.from_user.id) >= limit:
+        await message.answer(LIMIT_TEXT.format(limit=limit))
+        return
+
+    # форма общая с редактированием времени — начинаем с чистых данных
+    await state.set_data({})
     await message.answer("📝 Что нужно напомнить?")
     await state.set_state(ReminderForm.text)
 
@@ -217,8 +215,7 @@ async def handle_time_selected(
 ):
     data = await state.get_data()
     repeat_type = data["repeat_type"]
-    text = data["text"]
-    now = datetime.now()
+    now = datetime.now(await timezones.get(user_id))
 
     if repeat_type == "daily":
         run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
@@ -256,15 +253,7 @@ async def handle_time_selected(
     else:
         raise ValueError("Unsupported repeat_type for time picker")
 
-    await create_reminder(
-        user_id=user_id,
-        text=text,
-        run_at=run_at,
-        repeat_type=repeat_type,
-    )
-
-    await send_answer("✅ Напоминание сохранено!")
-    await state.clear()
+    await save_form(user_id=user_id, run_at=run_at, state=state, send_answer=send_answer)
 
 
 @router.callback_query(ReminderForm.time, F.data.startswith("time:"))
@@ -295,21 +284,24 @@ async def reminder_datetime(message: Message, state: FSMContext):
     repeat_type = data["repeat_type"]
 
     try:
-        run_at = datetime.strptime(message.text, "%d.%m.%Y %H:%M")
+        run_at = datetime.strptime(message.text, "%d.%m.%Y %H:%M").replace(
+            tzinfo=await timezones.get(message.from_user.id)
+        )
     except ValueError:
         await message.answer("❌ Неверный формат.")
         return
 
-    await create_reminder(
+    if repeat_type == "once" and run_at <= datetime.now(run_at.tzinfo):
+        await message.answer("❌ Это время уже прошло, введи другое.")
+        return
+
+    await save_form(
         user_id=message.from_user.id,
-        text=data["text"],
         run_at=run_at,
-        repeat_type=repeat_type,
+        state=state,
+        send_answer=message.answer,
     )
 
-    await message.answer("✅ Напоминание сохранено!")
-    await state.clear()
-
 
 @router.message(ReminderForm.time)
 async def pick_time_text(message: Message, state: FSMContext):
@@ -329,60 +321,153 @@ async def pick_time_text(message: Message, state: FSMContext):
     )
 
 
-@router.message(F.text == "📋 Мои напоминания")
-async def list_reminders(message: Message):
-    user_id = message.from_user.id
-    reminder_ids = await redis_client.smembers(f"user:{user_id}:reminders")
+async def render_reminders_page(user_id: int, page: int):
+    reminder_ids = await reminders.user_reminder_ids(user_id)
 
     if not reminder_ids:
-        await message.answer("У тебя пока нет напоминаний 🙃")
-        return
+        return "У тебя пока нет напоминаний 🙃", None
 
-    for rid in reminder_ids:
-        data = await redis_client.hgetall(f"reminder:{rid}")
+    # одна пачка на хеши и одна на время следующего запуска
+    records, next_runs = await asyncio.gather(
+        reminders.get_many(reminder_ids),
+        reminders.next_runs(reminder_ids),
+    )
 
-        if not data:
-            continue
+    items = sorted(
+        (
+            (next_run if next_run is not None else float("inf"), rid, data)
+            for rid, data, next_run in zip(reminder_ids, records, next_runs)
+            if data
+        ),
+        key=lambda item: item[:2],
+    )
 
-        run_at = datetime.fromisoformat(data["run_at"]).strftime("%d.%m.%Y %H:%M")
+    if not items:
+        return "У тебя пока нет напоминаний 🙃", None
+
+    pages = (len(items) + PAGE_SIZE - 1) // PAGE_SIZE
+    page = min(max(page, 0), pages - 1)
+    first = page * PAGE_SIZE
+    chunk = items[first:first + PAGE_SIZE]
+
+    lines = [f"📋 Мои напоминания ({len(items)})"]
+    for number, (next_run, rid, data) in enumerate(chunk, start=first + 1):
+        timezone = reminder_timezone(data, scheduler.timezone)
+        if next_run == float("inf"):
+            run_at = datetime.fromisoformat(data["run_at"]).astimezone(timezone)
+        else:
+            run_at = datetime.fromtimestamp(next_run, timezone)
         repeat = TYPE_MAP.get(data["type"], data["type"])
-        text = (
-            f"⏰ {run_at}\n"
-            f"📝 {data['text']}\n"
-            f"🔁 {repeat}"
+        if data.get("recipients"):
+            repeat += f" · 👥 {data['recipients']}"
+        if data.get("status") == "inactive":
+            repeat += " · ⏸ выключено"
+        text = data["text"]
+        if len(text) > TEXT_PREVIEW_LIMIT:
+            text = text[:TEXT_PREVIEW_LIMIT] + "…"
+
+        lines.append(
+            f"{number}. ⏰ {run_at.strftime('%d.%m.%Y %H:%M')} · 🔁 {repeat}\n"
+            f"📝 {text}"
         )
 
-        await message.answer(
-            text,
-            reply_markup=reminder_actions(rid)
-        )
+    keyboard = reminders_page_keyboard(
+        [rid for _, rid, _ in chunk], page, pages, first=first + 1
+    )
+    return "\n\n".join(lines), keyboard
 
 
-@router.callback_query(F.data.startswith("reminder:delete:"))
-async def delete_reminder(callback: CallbackQuery):
-    _, action, reminder_id = callback.data.split(":")
+async def remove_reminder(reminder_id: str) -> bool:
+    if await reminders.delete(reminder_id) is None:
+        return False
 
-    key = f"reminder:{reminder_id}"
-    data = await redis_client.hgetall(key)
+    # job'ы, созданные до перехода на диспетчер
+    try:
+        scheduler.remove_job(f"reminder_{reminder_id}")
+    except JobLookupError:
+        pass
+
+    return True
+
+
+@router.message(F.text == "📋 Мои напоминания", flags={"throttle": "list"})
+async def list_reminders(message: Message):
+    text, keyboard = await render_reminders_page(message.from_user.id, 0)
+    await message.answer(text, reply_markup=keyboard)
 
-    if not data:
-        await callback.answer("Напоминание уже удалено", show_alert=True)
-        return
 
-    user_id = int(data["user_id"])
+@router.callback_query(F.data.startswith("reminders:page:"), flags={"throttle": "list"})
+async def list_reminders_page(callback: CallbackQuery):
+    page = int(callback.data.split(":")[-1])
+    text, keyboard = await render_reminders_page(callback.from_user.id, page)
 
     try:
-        scheduler.remove_job(f"reminder_{reminder_id}")
-    except JobLookupError:
+        await callback.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest:
+        # страница не изменилась
+        pass
+    await callback.answer()
+
+
+@router.callback_query(F.data == "reminders:noop")
+async def list_reminders_noop(callback: CallbackQuery):
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("reminders:delete:"))
+async def delete_reminder_from_list(callback: CallbackQuery):
+    _, _, page, reminder_id = callback.data.split(":")
+
+    data = await reminders.get(reminder_id)
+    if not data or int(data["user_id"]) != callback.from_user.id or not await remove_reminder(reminder_id):
+        await callback.answer("Напоминание уже удалено", show_alert=True)
+    else:
+        await callback.answer("❌ Напоминание удалено")
+
+    text, keyboard = await render_reminders_page(callback.from_user.id, int(page))
+    try:
+        await callback.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest:
         pass
 
-    await redis_client.delete(key)
-    await redis_client.srem(f"user:{user_id}:reminders", reminder_id)
+
+@router.callback_query(F.data.startswith("reminder:delete:"))
+async def delete_reminder(callback: CallbackQuery):
+    _, action, reminder_id = callback.data.split(":")
+
+    data = await reminders.get(reminder_id)
+    if not data or int(data["user_id"]) != callback.from_user.id or not await remove_reminder(reminder_id):
+        await callback.answer("Напоминание уже удалено", show_alert=True)
+        return
 
     await callback.message.edit_text("❌ Напоминание удалено")
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("digest:delete:"))
+async def delete_reminder_from_digest(callback: CallbackQuery):
+    reminder_id = callback.data.split(":")[-1]
+
+    data = await reminders.get(reminder_id)
+    if not data or int(data["user_id"]) != callback.from_user.id or not await remove_reminder(reminder_id):
+        await callback.answer("Напоминание уже удалено", show_alert=True)
+    else:
+        await callback.answer("❌ Напоминание удалено")
+
+    # в дайджесте остаются кнопки остальных напоминаний
+    markup = callback.message.reply_markup
+    rows = [
+        row for row in (markup.inline_keyboard if markup else [])
+        if not any(button.callback_data.endswith(f":{reminder_id}") for button in row)
+    ]
+    try:
+        await callback.message.edit_reply_markup(
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
+        )
+    except TelegramBadRequest:
+        pass
+
+
 @router.callback_query(F.data == "reminder:edit:cancel")
 async def cancel_edit(callback: CallbackQuery, state: FSMContext):
     await state.clear()
@@ -394,7 +479,7 @@ async def cancel_edit(callback: CallbackQuery, state: FSMContext):
 async def edit_reminder_menu(callback: CallbackQuery, state: FSMContext):
     reminder_id = callback.data.split(":")[-1]
 
-    data = await redis_client.hgetall(f"reminder:{reminder_id}")
+    data = await reminders.get(reminder_id)
     if not data:
         await callback.answer("Напоминание не найдено", show_alert=True)
         return
@@ -412,7 +497,7 @@ async def edit_reminder_menu(callback: CallbackQuery, state: FSMContext):
 async def edit_text_start(callback: CallbackQuery, state: FSMContext):
     reminder_id = callback.data.split(":")[-1]
 
-    reminder = await redis_client.hgetall(f"reminder:{reminder_id}")
+    reminder = await reminders.get(reminder_id)
     if not reminder:
         await callback.answer("Напоминание не найдено", show_alert=True)
         return
@@ -440,7 +525,7 @@ async def save_edited_text(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    reminder = await redis_client.hgetall(f"reminder:{reminder_id}")
+    reminder = await reminders.get(reminder_id)
     if not reminder:
         await message.answer("❌ Напоминание не найдено.")
         await state.clear()
@@ -453,11 +538,120 @@ async def save_edited_text(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    await redis_client.hset(
-        f"reminder:{reminder_id}",
-        "text",
-        message.text
-    )
+    if not await reminders.update(reminder_id, {"text": message.text}):
+        await message.answer("❌ Напоминание не найдено.")
+        await state.clear()
+        return
 
     await message.answer("✅ Текст напоминания обновлён")
     await state.clear()
+
+
+@router.callback_query(F.data.startswith("reminder:edit:schedule:"))
+async def edit_schedule_start(callback: CallbackQuery, state: FSMContext):
+    reminder_id = callback.data.split(":")[-1]
+
+    reminder = await reminders.get(reminder_id)
+    if not reminder or int(reminder["user_id"]) != callback.from_user.id:
+        await callback.answer("Напоминание не найдено", show_alert=True)
+        return
+
+    # дальше те же шаги, что при создании, но в конце запись переносится, а не создаётся
+    await state.set_data({"reschedule_id": reminder_id})
+    await callback.message.answer(
+        f"⏰ Сейчас: {TYPE_MAP.get(reminder['type'], reminder['type']).lower()}\n\n"
+        "🔁 Как часто повторять напоминание?",
+        reply_markup=repeat_type_keyboard()
+    )
+    await state.set_state(ReminderForm.repeat_type)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("reminder:edit:recipients:"))
+async def edit_recipients_start(callback: CallbackQuery, state: FSMContext):
+    reminder_id = callback.data.split(":")[-1]
+
+    reminder = await reminders.get(reminder_id)
+    if not reminder or int(reminder["user_id"]) != callback.from_user.id:
+        await callback.answer("Напоминание не найдено", show_alert=True)
+        return
+
+    current = await reminders.recipients(reminder_id)
+    await state.update_data(reminder_id=reminder_id)
+    await callback.message.answer(
+        f"👥 Сейчас получатели: {' '.join(map(str, current)) if current else 'только ты'}\n\n"
+        f"Пришли id чатов через пробел: групп, где есть и бот, и ты.\n"
+        f"«-» — снова отправлять только тебе"
+    )
+    await state.set_state(ReminderEditForm.recipients)
+    await callback.answer()
+
+
+@router.message(ReminderEditForm.recipients)
+async def save_recipients(message: Message, state: FSMContext):
+    data = await state.get_data()
+    reminder_id = data.get("reminder_id")
+
+    try:
+        recipients = [] if message.text == "-" else parse_recipients(message.text or "")
+        if not recipients and message.text != "-":
+            raise ValueError("пришли хотя бы один id или «-»")
+    except ValueError as e:
+        await message.answer(f"❌ {e}")
+        return
+
+    foreign = await foreign_recipients(message.bot, message.from_user.id, recipients)
+    if foreign:
+        await message.answer(
+            f"❌ Ты не состоишь в этих чатах: {' '.join(map(str, foreign[:20]))}"
+            f"{' …' if len(foreign) > 20 else ''}"
+        )
+        return
+
+    if not reminder_id or not await reminders.set_recipients(reminder_id, recipients):
+        await message.answer("❌ Напоминание не найдено.")
+        await state.clear()
+        return
+
+    await message.answer(
+        f"✅ Получателей: {len(recipients)}" if recipients else "✅ Напоминание снова только для тебя"
+    )
+    await state.clear()
+
+
+@router.message(F.text.in_({"/timezone", "🌍 Часовой пояс"}))
+async def timezone_menu(message: Message, state: FSMContext):
+    current = await timezones.get(message.from_user.id)
+    await message.answer(
+        f"🌍 Текущий часовой пояс: {current.key}\n"
+        f"Выбери новый или пришли название, например Asia/Almaty",
+        reply_markup=timezone_keyboard()
+    )
+    await state.set_state(TimezoneForm.name)
+
+
+async def save_timezone(user_id: int, name: str, send_answer, state: FSMContext):
+    tz = parse_timezone(name)
+    if tz is None:
+        await send_answer("❌ Не знаю такой часовой пояс. Пример: Europe/Moscow")
+        return
+
+    await timezones.set(user_id, tz)
+    await send_answer(f"✅ Часовой пояс: {tz.key}\nНовые напоминания будут в этом времени")
+    await state.clear()
+
+
+@router.callback_query(TimezoneForm.name, F.data.startswith("tz:"))
+async def pick_timezone(callback: CallbackQuery, state: FSMContext):
+    await save_timezone(
+        callback.from_user.id,
+        callback.data.removeprefix("tz:"),
+        callback.message.answer,
+        state,
+    )
+    await callback.answer()
+
+
+@router.message(TimezoneForm.name)
+async def timezone_text(message: Message, state: FSMContext):
+    await save_timezone(message.from_user.id, message.text or "", message.answer, state)
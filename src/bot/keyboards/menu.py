@@ -1,11 +1,15 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
+from .registry import static
 
+
+@static
 def main_menu():
     return ReplyKeyboardMarkup(
         keyboard=[
             [KeyboardButton(text="➕ Добавить напоминание")],
-            [KeyboardButton(text="📋 Мои напоминания")]
+            [KeyboardButton(text="📋 Мои напоминания")],
+            [KeyboardButton(text="🌍 Часовой пояс")]
         ],
         resize_keyboard=True,
         one_time_keyboard=False
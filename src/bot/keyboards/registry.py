@@ -0,0 +1,48 @@
+from functools import cache
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+def static(builder):
+    """
+    Builds the keyboard once per set of arguments and returns that instance.
+
+    Cached markups are shared between all updates and must not be mutated.
+    """
+    return cache(builder)
+
+
+class KeyboardTemplate:
+    """
+    Inline keyboard with ``{name}`` placeholders in button text or callback data.
+
+    Buttons are validated once. ``render`` copies only the buttons that
+    contain a placeholder and reuses the others as they are.
+    """
+
+    def __init__(self, rows: list[list[InlineKeyboardButton]]):
+        self.rows = [
+            [(button, self._fields(button)) for button in row]
+            for row in rows
+        ]
+
+    @staticmethod
+    def _fields(button: InlineKeyboardButton) -> tuple[str, ...]:
+        return tuple(
+            name for name in ("text", "callback_data")
+            if "{" in (getattr(button, name) or "")
+        )
+
+    def render_rows(self, **values) -> list[list[InlineKeyboardButton]]:
+        return [
+            [
+                button.model_copy(update={
+                    name: getattr(button, name).format(**values) for name in fields
+                }) if fields else button
+                for button, fields in row
+            ]
+            for row in self.rows
+        ]
+
+    def render(self, **values) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup(inline_keyboard=self.render_rows(**values))
@@ -1,37 +1,105 @@
-def reminder_actions(reminder_id: str):
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="✏️ Редактировать",
-                    callback_data=f"reminder:edit:{reminder_id}"
-                ),
-                InlineKeyboardButton(
-                    text="❌ Удалить",
-                    callback_data=f"reminder:delete:{reminder_id}"
-                ),
-            ]
-        ]
-    )
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from .registry import KeyboardTemplate
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+EDIT_MENU = KeyboardTemplate([
+    [
+        InlineKeyboardButton(
+            text="📝 Текст",
+            callback_data="reminder:edit:text:{reminder_id}"
+        )
+    ],
+    [
+        InlineKeyboardButton(
+            text="⏰ Время и повтор",
+            callback_data="reminder:edit:schedule:{reminder_id}"
+        )
+    ],
+    [
+        InlineKeyboardButton(
+            text="👥 Получатели",
+            callback_data="reminder:edit:recipients:{reminder_id}"
+        )
+    ],
+    [
+        InlineKeyboardButton(
+            text="❌ Отмена",
+            callback_data="reminder:edit:cancel"
+        )
+    ],
+])
+
+PAGE_ROW = KeyboardTemplate([
+    [
+        InlineKeyboardButton(
+            text="✏️ {number}",
+            callback_data="reminder:edit:{reminder_id}"
+        ),
+        InlineKeyboardButton(
+            text="❌ {number}",
+            callback_data="reminders:delete:{page}:{reminder_id}"
+        ),
+    ]
+])
+
+DIGEST_ROW = KeyboardTemplate([
+    [
+        InlineKeyboardButton(
+            text="✏️ {number}",
+            callback_data="reminder:edit:{reminder_id}"
+        ),
+        InlineKeyboardButton(
+            text="❌ {number}",
+            callback_data="digest:delete:{reminder_id}"
+        ),
+    ]
+])
+
+PAGE_NAVIGATION = KeyboardTemplate([
+    [
+        InlineKeyboardButton(
+            text="◀️",
+            callback_data="reminders:page:{previous}"
+        ),
+        InlineKeyboardButton(
+            text="{current}/{pages}",
+            callback_data="reminders:noop"
+        ),
+        InlineKeyboardButton(
+            text="▶️",
+            callback_data="reminders:page:{next}"
+        ),
+    ]
+])
 
 
 def edit_menu(reminder_id: str):
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="📝 Текст",
-                    callback_data=f"reminder:edit:text:{reminder_id}"
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="❌ Отмена",
-                    callback_data="reminder:edit:cancel"
-                )
-            ],
-        ]
-    )
+    return EDIT_MENU.render(reminder_id=reminder_id)
+
+
+def reminders_page_keyboard(reminder_ids: list[str], page: int, pages: int, first: int = 1):
+    keyboard = []
+    for number, reminder_id in enumerate(reminder_ids, start=first):
+        keyboard += PAGE_ROW.render_rows(number=number, reminder_id=reminder_id, page=page)
+
+    if pages > 1:
+        keyboard += PAGE_NAVIGATION.render_rows(
+            previous=(page - 1) % pages,
+            current=page + 1,
+            pages=pages,
+            next=(page + 1) % pages,
+        )
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def digest_keyboard(items: list[tuple[int, str]]):
+    """Rows of ``(number in the digest, reminder id)``."""
+    if not items:
+        return None
+
+    keyboard = []
+    for number, reminder_id in items:
+        keyboard += DIGEST_ROW.render_rows(number=number, reminder_id=reminder_id)
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
@@ -1,6 +1,9 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from .registry import static
 
+
+@static
 def repeat_type_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -13,6 +16,7 @@ def repeat_type_keyboard():
     )
 
 
+@static
 def weekday_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -29,6 +33,7 @@ def weekday_keyboard():
     )
 
 
+@static
 def monthday_keyboard():
     buttons = [
         InlineKeyboardButton(text=str(i), callback_data=f"md:{i}")
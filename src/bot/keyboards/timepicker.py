@@ -1,6 +1,9 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from .registry import static
 
+
+@static
 def time_picker_keyboard(
     start_hour: int = 9,
     end_hour: int = 20,
@@ -0,0 +1,34 @@
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from .registry import static
+
+
+TIMEZONES = [
+    ("Калининград", "Europe/Kaliningrad"),
+    ("Москва", "Europe/Moscow"),
+    ("Самара", "Europe/Samara"),
+    ("Екатеринбург", "Asia/Yekaterinburg"),
+    ("Омск", "Asia/Omsk"),
+    ("Новосибирск", "Asia/Novosibirsk"),
+    ("Красноярск", "Asia/Krasnoyarsk"),
+    ("Иркутск", "Asia/Irkutsk"),
+    ("Владивосток", "Asia/Vladivostok"),
+    ("Лондон", "Europe/London"),
+    ("Берлин", "Europe/Berlin"),
+    ("UTC", "UTC"),
+]
+
+
+@static
+def timezone_keyboard():
+    buttons = [
+        InlineKeyboardButton(text=title, callback_data=f"tz:{name}")
+        for title, name in TIMEZONES
+    ]
+
+    keyboard = [
+        buttons[i:i + 3]
+        for i in range(0, len(buttons), 3)
+    ]
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
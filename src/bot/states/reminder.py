@@ -12,3 +12,12 @@ class ReminderForm(StatesGroup):
 
 class ReminderEditForm(StatesGroup):
     text = State()
+    recipients = State()
+
+
+class TimezoneForm(StatesGroup):
+    name = State()
+
+
+class ImportForm(StatesGroup):
+    file = State()
@@ -0,0 +1,103 @@
+import math
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import settings
+from metrics.base import updates_throttled
+from storage import AsyncRedisOverride, redis_client
+
+
+ALLOWED = 1
+REJECTED = 0
+# отказ, о котором пользователь в этом окне уже знает
+SILENT = -1
+
+# KEYS: счётчик текущего окна, счётчик прошлого окна, метка «уже предупредили»
+# ARGV: лимит, вес прошлого окна, окно в секундах
+HIT_SCRIPT = """
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if current + previous * tonumber(ARGV[2]) >= tonumber(ARGV[1]) then
+    if redis.call("SET", KEYS[3], 1, "NX", "EX", ARGV[3]) then
+        return 0
+    end
+    return -1
+end
+redis.call("INCR", KEYS[1])
+-- счётчик нужен ещё одно окно как «прошлый»
+redis.call("EXPIRE", KEYS[1], 2 * tonumber(ARGV[3]))
+return 1
+"""
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limit per user and action.
+
+    Each action counts hits in fixed windows of ``throttle:<action>:<user>:<n>``
+    keys; a hit is allowed while the current window plus the part of the
+    previous one still inside the sliding window stays under the limit.
+    Rejected hits are not counted, so a user who keeps clicking gets through
+    again as soon as the window slides past the allowed ones.
+    """
+
+    def __init__(self, client: AsyncRedisOverride, limits: dict[str, tuple[int, float]]):
+        self.client = client
+        self.limits = limits
+        self._hit = client.register_script(HIT_SCRIPT)
+
+    async def hit(self, action: str, user_id: int, now: float | None = None) -> int:
+        """Returns ``ALLOWED``, ``REJECTED`` or ``SILENT`` (rejected again within the window)."""
+        limit, window = self.limits[action]
+        now = time.time() if now is None else now
+        number, elapsed = divmod(now, window)
+        key = f"throttle:{action}:{user_id}"
+        return await self._hit(
+            keys=[f"{key}:{int(number)}", f"{key}:{int(number) - 1}", f"{key}:warned"],
+            args=[limit, 1 - elapsed / window, math.ceil(window)],
+        )
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Router middleware that applies ``RateLimiter`` before a handler runs.
+
+    The action comes from the handler's ``throttle`` flag; handlers without
+    one share the ``default`` action. Actions without a rule are not limited.
+    The user is told once per window, further rejected updates are dropped
+    silently so a flood does not turn into outgoing messages; a dropped
+    button press is still answered without text to stop its spinner.
+    """
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        action = get_flag(data, "throttle", default="default")
+        user = data.get("event_from_user")
+        if user is None or action not in self.limiter.limits:
+            return await handler(event, data)
+
+        result = await self.limiter.hit(action, user.id)
+        if result == ALLOWED:
+            return await handler(event, data)
+
+        updates_throttled.labels(action).inc()
+        if result == REJECTED and isinstance(event, (Message, CallbackQuery)):
+            await event.answer("⏳ Слишком часто, попробуй чуть позже")
+        elif isinstance(event, CallbackQuery):
+            # без ответа у кнопки крутятся часики до таймаута
+            await event.answer()
+
+
+rate_limiter = RateLimiter(redis_client, settings.throttle_limits)
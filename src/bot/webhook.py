@@ -0,0 +1,71 @@
+import hmac
+import logging
+from collections.abc import Awaitable, Callable
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
+from config import settings
+from .executor import update_executor
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookHandler:
+    """
+    Feeds webhook updates straight to the dispatcher.
+
+    Telegram gets its 200 as soon as the update is queued by the chat
+    executor (see ``bot.executor``). While the executor is full the response
+    is held back, so Telegram slows down instead of us piling up updates.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, secret: str):
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret
+
+    async def __call__(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self.secret):
+            return web.Response(status=401)
+
+        update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Failed to process update %s", update.update_id)
+
+        return web.Response()
+
+
+async def start_webhook(dp: Dispatcher, bot: Bot) -> Callable[[float], Awaitable[None]]:
+    """Starts the webhook server and returns a coroutine function that stops it."""
+    app = web.Application()
+    app.router.add_post(settings.webhook_path, WebhookHandler(dp, bot, secret=settings.webhook_secret))
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+
+    # апдейты, пришедшие во время деплоя, Telegram держит у себя до нового вебхука
+    await bot.set_webhook(
+        f"{settings.webhook_base_url.rstrip('/')}{settings.webhook_path}",
+        secret_token=settings.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    async def stop(timeout: float):
+        # новые апдейты не принимаем, начатые доделываем
+        await site.stop()
+        await update_executor.drain(timeout)
+        await runner.cleanup()
+
+    return stop
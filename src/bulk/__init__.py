@@ -0,0 +1,2 @@
+from .formats import FormatError, detect_format, parse
+from .service import ExportFile, ImportResult, export_reminders, import_reminders
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from storage import timezones
+from storage.timezones import parse_timezone
+from . import FormatError, detect_format, export_reminders, import_reminders, parse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m bulk",
+        description="Import reminders from CSV/JSON/iCal or export them",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import")
+    load.add_argument("file")
+    load.add_argument("--user", type=int, required=True)
+    load.add_argument("--tz", help="zone for rows without one, default — the user's zone")
+    load.add_argument("--batch", type=int, default=1000, help="reminders per pipeline")
+
+    dump = commands.add_parser("export")
+    dump.add_argument("--user", type=int, required=True)
+    dump.add_argument("--format", choices=("csv", "json", "ics"), default="csv")
+    dump.add_argument("-o", "--output", help="file to write, default — stdout")
+    return parser.parse_args()
+
+
+async def run_import(args):
+    tz = parse_timezone(args.tz) if args.tz else await timezones.get(args.user)
+    if tz is None:
+        sys.exit(f"Unknown timezone: {args.tz}")
+
+    with open(args.file, "rb") as f:
+        content = f.read()
+
+    started = time.perf_counter()
+    try:
+        result = await import_reminders(
+            args.user, parse(content, detect_format(args.file)), tz, batch_size=args.batch
+        )
+    except FormatError as e:
+        sys.exit(str(e))
+
+    seconds = time.perf_counter() - started
+    print(json.dumps({
+        "created": result.created,
+        "errors": result.errors,
+        "seconds": round(seconds, 3),
+        "per_second": round(result.created / seconds, 1) if seconds else None,
+    }, ensure_ascii=False, indent=2))
+
+
+async def run_export(args):
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in export_reminders(args.user, args.format):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    asyncio.run(run_import(arguments) if arguments.command == "import" else run_export(arguments))
@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+import re
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+
+FIELDS = ("text", "run_at", "type", "tz", "recipients")
+
+ICAL_FREQ = {
+    "DAILY": "daily",
+    "WEEKLY": "weekly",
+    "MONTHLY": "monthly",
+    "YEARLY": "yearly",
+}
+
+ICAL_ESCAPE = re.compile(r"\\([\\;,nN])")
+
+
+class FormatError(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension in ("csv", "json"):
+        return extension
+    if extension in ("ics", "ical"):
+        return "ics"
+    raise FormatError(f"Не поддерживаю файлы .{extension}: нужен csv, json или ics")
+
+
+# ---------- import ----------
+
+def parse_csv(content: bytes) -> Iterator[dict]:
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    if not reader.fieldnames or "text" not in reader.fieldnames or "run_at" not in reader.fieldnames:
+        raise FormatError("В CSV нужна строка заголовка с колонками text и run_at")
+    for row in reader:
+        yield {field: (row.get(field) or "").strip() for field in FIELDS}
+
+
+def parse_json(content: bytes) -> Iterator[dict]:
+    try:
+        items = json.loads(content)
+    except ValueError as e:
+        raise FormatError(f"Некорректный JSON: {e}") from None
+    if isinstance(items, dict):
+        items = items.get("reminders")
+    if not isinstance(items, list):
+        raise FormatError('JSON должен быть списком напоминаний или {"reminders": [...]}')
+
+    for item in items:
+        if not isinstance(item, dict):
+            yield {}
+            continue
+        yield {field: _json_value(item.get(field)) for field in FIELDS}
+
+
+def _json_value(value) -> str:
+    if isinstance(value, list):
+        return " ".join(map(str, value))
+    return str(value or "").strip()
+
+
+def _ical_lines(text: str) -> Iterator[str]:
+    # строки, начинающиеся с пробела, продолжают предыдущую (RFC 5545, 3.1)
+    line = None
+    for raw in text.splitlines():
+        if raw[:1] in (" ", "\t") and line is not None:
+            line += raw[1:]
+            continue
+        if line is not None:
+            yield line
+        line = raw
+    if line is not None:
+        yield line
+
+
+def _ical_unescape(value: str) -> str:
+    return ICAL_ESCAPE.sub(lambda match: "\n" if match[1] in "nN" else match[1], value)
+
+
+def _ical_datetime(value: str) -> str:
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").isoformat() + "+00:00"
+    if "T" in value:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S").isoformat()
+    return datetime.strptime(value, "%Y%m%d").isoformat()
+
+
+def parse_ical(content: bytes) -> Iterator[dict]:
+    event = None
+    for line in _ical_lines(content.decode("utf-8-sig")):
+        name, _, value = line.partition(":")
+        name, *params = name.split(";")
+        name = name.upper()
+
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {"text": "", "run_at": "", "type": "once", "tz": "", "recipients": ""}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            yield event
+            event = None
+        elif event is None:
+            continue
+        elif name == "SUMMARY":
+            event["text"] = _ical_unescape(value).strip()
+        elif name == "DTSTART":
+            try:
+                event["run_at"] = _ical_datetime(value.strip())
+            except ValueError:
+                event["run_at"] = value
+            for param in params:
+                key, _, param_value = param.partition("=")
+                if key.upper() == "TZID":
+                    event["tz"] = param_value.strip('"')
+        elif name == "RRULE":
+            rule = dict(part.partition("=")[::2] for part in value.upper().split(";"))
+            if rule.get("INTERVAL", "1") != "1" or set(rule) - {"FREQ", "INTERVAL", "WKST"}:
+                # BYDAY, COUNT и т.п. не выражаются нашими типами повтора
+                event["type"] = f"RRULE:{value}"
+            else:
+                event["type"] = ICAL_FREQ.get(rule.get("FREQ"), f"RRULE:{value}")
+
+
+PARSERS = {"csv": parse_csv, "json": parse_json, "ics": parse_ical}
+
+
+def parse(content: bytes, fmt: str) -> Iterator[dict]:
+    try:
+        yield from PARSERS[fmt](content)
+    except UnicodeDecodeError:
+        raise FormatError("Файл должен быть в UTF-8") from None
+    except csv.Error as e:
+        raise FormatError(f"Некорректный CSV: {e}") from None
+
+
+# ---------- export ----------
+
+def _export_row(data: dict) -> dict:
+    return {field: data.get(field, "") for field in FIELDS}
+
+
+class CsvWriter:
+    media_type = "text/csv"
+
+    def header(self) -> str:
+        return ",".join(FIELDS) + "\r\n"
+
+    def rows(self, batch: list[tuple[str, dict]]) -> str:
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=FIELDS).writerows(_export_row(data) for _, data in batch)
+        return buffer.getvalue()
+
+    def footer(self) -> str:
+        return ""
+
+
+class JsonWriter:
+    media_type = "application/json"
+
+    def __init__(self):
+        self._first = True
+
+    def header(self) -> str:
+        return "["
+
+    def rows(self, batch: list[tuple[str, dict]]) -> str:
+        chunks = []
+        for _, data in batch:
+            separator = "\n  " if self._first else ",\n  "
+            chunks.append(separator + json.dumps(_export_row(data), ensure_ascii=False))
+            self._first = False
+        return "".join(chunks)
+
+    def footer(self) -> str:
+        return "\n]\n"
+
+
+class IcalWriter:
+    media_type = "text/calendar"
+
+    def header(self) -> str:
+        return "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//telegram-notification//EN\r\n"
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        return (
+            value.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n")
+        )
+
+    def rows(self, batch: list[tuple[str, dict]]) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        lines = []
+        for reminder_id, data in batch:
+            run_at = datetime.fromisoformat(data["run_at"])
+            if data.get("tz"):
+                run_at = run_at.astimezone(ZoneInfo(data["tz"]))
+                start = f"DTSTART;TZID={data['tz']}:{run_at:%Y%m%dT%H%M%S}"
+            else:
+                start = f"DTSTART:{run_at.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{reminder_id}@telegram-notification",
+                f"DTSTAMP:{stamp}",
+                start,
+                f"SUMMARY:{self._escape(data.get('text', ''))}",
+            ]
+            if data.get("type") in ICAL_FREQ.values():
+                frequency = next(key for key, value in ICAL_FREQ.items() if value == data["type"])
+                lines.append(f"RRULE:FREQ={frequency}")
+            lines.append("END:VEVENT")
+        return "".join(line + "\r\n" for line in lines)
+
+    def footer(self) -> str:
+        return "END:VCALENDAR\r\n"
+
+
+WRITERS = {"csv": CsvWriter, "json": JsonWriter, "ics": IcalWriter}
@@ -0,0 +1,174 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+
+from aiogram import Bot
+from aiogram.types import InputFile
+
+from scheduler.fanout import MAX_RECIPIENTS, foreign_recipients, parse_recipients
+from scheduler.triggers import REPEAT_TYPES, build_reminder
+from storage import reminders
+from storage.timezones import parse_timezone
+from .formats import WRITERS
+
+
+IMPORT_LIMIT = 10_000
+# столько строк разбираем подряд, потом отдаём цикл событий другим чатам
+VALIDATE_CHUNK = 500
+TEXT_LIMIT = 4000
+DATETIME_FORMATS = ("%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def parse_run_at(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"не понял дату «{value}»")
+
+
+def validate(row: dict, user_id: int, default_tz: tzinfo) -> tuple[dict, float, list[int]]:
+    text = row.get("text", "")
+    if not text:
+        raise ValueError("пустой текст")
+    if len(text) > TEXT_LIMIT:
+        raise ValueError(f"текст длиннее {TEXT_LIMIT} символов")
+
+    repeat_type = row.get("type") or "once"
+    if repeat_type not in REPEAT_TYPES:
+        raise ValueError(f"неизвестный тип повтора «{repeat_type}»")
+
+    timezone = default_tz
+    if row.get("tz"):
+        timezone = parse_timezone(row["tz"])
+        if timezone is None:
+            raise ValueError(f"неизвестный часовой пояс «{row['tz']}»")
+
+    run_at = parse_run_at(row.get("run_at", ""))
+    if run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=timezone)
+    else:
+        run_at = run_at.astimezone(timezone)
+
+    data, first_run = build_reminder(
+        user_id=user_id, text=text, run_at=run_at, repeat_type=repeat_type
+    )
+    # DateTrigger отдаёт дату и из прошлого
+    if first_run is None or first_run <= datetime.now(first_run.tzinfo):
+        raise ValueError("время уже прошло")
+    return data, first_run.timestamp(), parse_recipients(row.get("recipients", ""))
+
+
+async def drop_foreign_recipients(bot: Bot, user_id: int, items: list, result: ImportResult) -> list:
+    """Rejects numbered rows that send to chats the user is not a member of."""
+    recipients = sorted({chat_id for _, (_, _, chat_ids) in items for chat_id in chat_ids})
+    if len(recipients) > MAX_RECIPIENTS:
+        # каждый чат проверяется запросом к Bot API — не даём файлу устроить их тысячи
+        result.errors.append(f"в файле больше {MAX_RECIPIENTS} разных получателей, такие записи пропущены")
+        return [(number, item) for number, item in items if not item[2]]
+
+    foreign = set(await foreign_recipients(bot, user_id, recipients))
+    kept = []
+    for number, item in items:
+        denied = foreign.intersection(item[2])
+        if denied:
+            result.errors.append(f"запись {number}: ты не состоишь в чатах {' '.join(map(str, sorted(denied)))}")
+        else:
+            kept.append((number, item))
+    return kept
+
+
+async def import_reminders(
+    user_id: int,
+    rows: Iterable[dict],
+    default_tz: tzinfo,
+    batch_size: int = 1000,
+    limit: int = 0,
+    bot: Bot | None = None,
+) -> ImportResult:
+    """
+    Validates rows and writes valid ones in pipelined batches.
+
+    Invalid rows are reported by their number and do not stop the import.
+    The whole file is parsed before the first write, so a ``FormatError``
+    leaves nothing behind; parsing yields to the event loop every
+    ``VALIDATE_CHUNK`` rows. With ``limit`` the user ends up with at most that
+    many reminders. With ``bot`` rows whose recipients include chats the
+    user is not a member of are rejected.
+    """
+    result = ImportResult()
+    items = []
+    for number, row in enumerate(rows, start=1):
+        if number > IMPORT_LIMIT:
+            result.errors.append(f"больше {IMPORT_LIMIT} записей, остальные пропущены")
+            break
+        if number % VALIDATE_CHUNK == 0:
+            await asyncio.sleep(0)
+        try:
+            items.append((number, validate(row, user_id, default_tz)))
+        except ValueError as e:
+            result.errors.append(f"запись {number}: {e}")
+        except OverflowError:
+            # 0001-01-01 со смещением и т.п. — astimezone/timestamp выходят за пределы datetime
+            result.errors.append(f"запись {number}: дата вне допустимого диапазона")
+
+    if bot is not None:
+        items = await drop_foreign_recipients(bot, user_id, items, result)
+
+    skipped = 0
+    for start in range(0, len(items), batch_size):
+        batch = [item for _, item in items[start:start + batch_size]]
+        if skipped:
+            # лимит уже достигнут — дальше писать нечего
+            skipped += len(batch)
+            continue
+        created = len(await reminders.create_many(batch, limit=limit))
+        result.created += created
+        skipped += len(batch) - created
+    if skipped:
+        result.errors.append(f"достигнут лимит напоминаний ({limit}), пропущено записей: {skipped}")
+    return result
+
+
+async def export_reminders(user_id: int, fmt: str, batch_size: int = 500) -> AsyncIterator[bytes]:
+    """Streams the user's reminders, reading ``batch_size`` records per round trip."""
+    writer = WRITERS[fmt]()
+    yield writer.header().encode()
+
+    reminder_ids = sorted(await reminders.user_reminder_ids(user_id))
+    for start in range(0, len(reminder_ids), batch_size):
+        chunk = reminder_ids[start:start + batch_size]
+        records = await reminders.get_many(chunk)
+        batch = [(rid, data) for rid, data in zip(chunk, records) if data]
+        for rid, data in batch:
+            if data.get("recipients"):
+                data["recipients"] = " ".join(map(str, await reminders.recipients(rid)))
+        if batch:
+            yield writer.rows(batch).encode()
+
+    yield writer.footer().encode()
+
+
+class ExportFile(InputFile):
+    """Export uploaded to Telegram while it is being read from Redis."""
+
+    def __init__(self, user_id: int, fmt: str):
+        super().__init__(filename=f"reminders.{fmt}")
+        self.user_id = user_id
+        self.fmt = fmt
+
+    async def read(self, bot: Bot) -> AsyncIterator[bytes]:
+        async for chunk in export_reminders(self.user_id, self.fmt):
+            yield chunk
@@ -1,7 +1,9 @@
+import os
+import socket
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -15,3 +17,83 @@ class Settings(BaseSettings):
     redis_db: int = Field(alias="REDIS_DB", default=0)
 
     bot_key: str = Field(alias="BOT_KEY")
+
+    default_timezone: str = Field(alias="DEFAULT_TIMEZONE", default="Europe/Moscow")
+    reminder_encoding: Literal["hash", "packed"] = Field(alias="REMINDER_ENCODING", default="hash")
+    reminder_cache_size: int = Field(alias="REMINDER_CACHE_SIZE", default=10000)
+    reminder_cache_ttl: float = Field(alias="REMINDER_CACHE_TTL", default=60)
+
+    bot_mode: Literal["polling", "webhook"] = Field(alias="BOT_MODE", default="polling")
+    webhook_base_url: str = Field(alias="WEBHOOK_BASE_URL", default="")
+    webhook_path: str = Field(alias="WEBHOOK_PATH", default="/webhook")
+    webhook_secret: str = Field(alias="WEBHOOK_SECRET", default="")
+    webhook_host: str = Field(alias="WEBHOOK_HOST", default="0.0.0.0")
+    webhook_port: int = Field(alias="WEBHOOK_PORT", default=8080)
+
+    update_concurrency: int = Field(alias="UPDATE_CONCURRENCY", default=100)
+    update_queue_size: int = Field(alias="UPDATE_QUEUE_SIZE", default=1000)
+    update_chat_queue: int = Field(alias="UPDATE_CHAT_QUEUE", default=20)
+    # действие:лимит/окно в секундах; default — для хендлеров без флага throttle
+    throttle_rules: str = Field(
+        alias="THROTTLE_RULES",
+        default="create:10/60,list:20/60,import:3/600,default:60/60",
+    )
+    max_reminders_per_user: int = Field(alias="MAX_REMINDERS_PER_USER", default=500)
+
+    worker_roles: str = Field(alias="WORKER_ROLES", default="updates,scheduler,delivery")
+    shutdown_timeout: float = Field(alias="SHUTDOWN_TIMEOUT", default=25)
+    worker_name: str = Field(
+        alias="WORKER_NAME",
+        default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}",
+    )
+    leader_lease_seconds: int = Field(alias="LEADER_LEASE_SECONDS", default=15)
+
+    fsm_storage: Literal["redis", "memory"] = Field(alias="FSM_STORAGE", default="redis")
+    fsm_state_ttl: int = Field(alias="FSM_STATE_TTL", default=86400)
+    fsm_data_ttl: int = Field(alias="FSM_DATA_TTL", default=86400)
+
+    delivery_global_rate: float = Field(alias="DELIVERY_GLOBAL_RATE", default=25)
+    delivery_chat_rate: float = Field(alias="DELIVERY_CHAT_RATE", default=1)
+    delivery_workers: int = Field(alias="DELIVERY_WORKERS", default=16)
+    delivery_queue_size: int = Field(alias="DELIVERY_QUEUE_SIZE", default=10000)
+    digest_window: int = Field(alias="DIGEST_WINDOW", default=0)
+    delivery_log_size: int = Field(alias="DELIVERY_LOG_SIZE", default=100000)
+    retry_base_seconds: float = Field(alias="RETRY_BASE_SECONDS", default=30)
+    retry_max_attempts: int = Field(alias="RETRY_MAX_ATTEMPTS", default=6)
+    reconcile_interval: int = Field(alias="RECONCILE_INTERVAL", default=10)
+    reconcile_ops: int = Field(alias="RECONCILE_OPS", default=500)
+
+    metrics_host: str = Field(alias="METRICS_HOST", default="0.0.0.0")
+    metrics_port: int = Field(alias="METRICS_PORT", default=9100)
+
+    misfire_grace_seconds: int = Field(alias="MISFIRE_GRACE_SECONDS", default=60)
+    catchup_rate: float = Field(alias="CATCHUP_RATE", default=5)
+
+    @property
+    def roles(self) -> set[str]:
+        return {role.strip() for role in self.worker_roles.split(",") if role.strip()}
+
+    @property
+    def throttle_limits(self) -> dict[str, tuple[int, float]]:
+        limits = {}
+        for rule in self.throttle_rules.split(","):
+            if not rule.strip():
+                continue
+            action, _, rate = rule.strip().partition(":")
+            limit, _, window = rate.partition("/")
+            limits[action] = (int(limit), float(window))
+        return limits
+
+    @model_validator(mode="after")
+    def check_webhook(self):
+        if self.bot_mode == "webhook" and not (self.webhook_base_url and self.webhook_secret):
+            raise ValueError("WEBHOOK_BASE_URL and WEBHOOK_SECRET are required in webhook mode")
+        return self
+
+    @model_validator(mode="after")
+    def check_throttle_rules(self):
+        try:
+            self.throttle_limits
+        except ValueError:
+            raise ValueError("THROTTLE_RULES must look like create:10/60,list:20/60")
+        return self
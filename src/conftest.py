@@ -0,0 +1,38 @@
+import asyncio
+import os
+
+import pytest
+
+
+# настройки обязательны при импорте config — тестам хватает заглушек
+os.environ.setdefault("BOT_KEY", "42:test")
+os.environ.setdefault("REDIS_HOST", "localhost")
+os.environ.setdefault("REDIS_PORT", "6379")
+os.environ.setdefault("REDIS_PASSWORD", "")
+
+try:
+    from bench.env import use_fakeredis
+    # до импорта storage: клиенты приложения создаются уже поверх fakeredis
+    use_fakeredis()
+    FAKEREDIS = True
+except ImportError:
+    FAKEREDIS = False
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    """Runs a coroutine on the shared loop against an empty fakeredis."""
+    if not FAKEREDIS:
+        pytest.skip("fakeredis[lua] is not installed")
+
+    from storage import redis_client
+
+    loop.run_until_complete(redis_client.flushdb())
+    return loop.run_until_complete
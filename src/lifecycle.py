@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import signal
+import time
+from collections.abc import Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """
+    Orderly shutdown on SIGTERM/SIGINT.
+
+    Every component registers its stop step right after it starts; steps run
+    in reverse order, so intake stops before the parts it feeds and shared
+    connections close last. All steps share one ``timeout``: a step that
+    overruns it is abandoned and the next one runs. The last ``reserve``
+    seconds of it are not handed out as work time (``remaining``) and are
+    left for the steps that close connections, so the whole shutdown stays
+    within ``timeout``. A second signal aborts the shutdown.
+    """
+
+    def __init__(self, timeout: float, reserve: float = 2):
+        self.timeout = timeout
+        self.reserve = min(reserve, timeout / 2)
+        self._steps: list[tuple[str, Callable[[], Awaitable]]] = []
+        self._stopping = asyncio.Event()
+        self._deadline: float | None = None
+        self._main: asyncio.Task | None = None
+
+    def install(self):
+        self._main = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._on_signal, sig)
+
+    def on_stop(self, name: str, step: Callable[[], Awaitable]):
+        self._steps.append((name, step))
+
+    def stop(self):
+        self._stopping.set()
+
+    def remaining(self) -> float:
+        """Seconds left for in-flight work, not counting the reserve."""
+        if self._deadline is None:
+            return self.timeout - self.reserve
+        return max(self._deadline - self.reserve - time.monotonic(), 0)
+
+    def _step_timeout(self, steps_left: int) -> float:
+        # время работы вышло — оставшиеся шаги поровну делят резерв до общего дедлайна
+        return self.remaining() or max(self._deadline - time.monotonic(), 0) / steps_left
+
+    async def run(self):
+        """Waits for a signal, then runs the stop steps."""
+        await self._stopping.wait()
+        self._deadline = time.monotonic() + self.timeout
+
+        for left, (name, step) in zip(range(len(self._steps), 0, -1), reversed(self._steps)):
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(step(), timeout=self._step_timeout(left))
+            except asyncio.TimeoutError:
+                logger.warning("Stopping %s timed out", name)
+            except Exception:
+                logger.exception("Stopping %s failed", name)
+            else:
+                logger.info("Stopped %s in %.2fs", name, time.monotonic() - started)
+
+    def _on_signal(self, sig: signal.Signals):
+        if self._stopping.is_set():
+            logger.warning("Received %s again, aborting shutdown", sig.name)
+            if self._main is not None:
+                self._main.cancel()
+            return
+
+        logger.warning("Received %s, shutting down within %ss", sig.name, self.timeout)
+        self._stopping.set()
@@ -1,22 +1,107 @@
 import asyncio
+import logging
 
 from aiogram import Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from bot import bot
+from bot.executor import ChatExecutorMiddleware, update_executor
+from bot.fsm import build_fsm_storage
+from bot.handlers.bulk import router as bulk_router
 from bot.handlers.reminder import router
+from bot.throttling import ThrottlingMiddleware, rate_limiter
+from bot.webhook import start_webhook
+from config import settings
+from lifecycle import Lifecycle
+from metrics import HandlerMetricsMiddleware, start_metrics_server
 from scheduler.base import start_scheduler
+from scheduler.delivery import delivery_queue
+from scheduler.dispatcher import start_dispatcher, stop_dispatcher
+from scheduler.stats import collect_metrics
+from scheduler.worker import DeliveryWorker
+from storage import redis_client, reminder_cache
+
+
+async def start_polling(dp: Dispatcher, lifecycle: Lifecycle):
+    # без drop_pending_updates: апдейты, пришедшие во время деплоя, не теряются
+    await bot.delete_webhook()
+
+    # апдейты раздаёт update_executor — сам polling их не параллелит
+    polling = asyncio.create_task(
+        dp.start_polling(bot, handle_as_tasks=False, handle_signals=False, close_bot_session=False)
+    )
+    # упавший polling останавливает весь процесс
+    polling.add_done_callback(lambda _: lifecycle.stop())
+
+    async def stop():
+        if not polling.done():
+            await dp.stop_polling()
+        await asyncio.gather(polling, return_exceptions=True)
+        # даём доработать уже принятым апдейтам
+        await update_executor.drain(lifecycle.remaining())
+
+    lifecycle.on_stop("polling", stop)
 
 
 async def main():
+    logging.basicConfig(level=logging.INFO)
+    roles = settings.roles
+
+    lifecycle = Lifecycle(timeout=settings.shutdown_timeout)
+    lifecycle.install()
+
+    # шаги остановки выполняются в обратном порядке: соединения закрываются последними
+    lifecycle.on_stop("redis", redis_client.aclose)
+    lifecycle.on_stop("bot session", bot.session.close)
+
+    if settings.metrics_port:
+        # порт 0 отключает /metrics
+        metrics = await start_metrics_server(
+            settings.metrics_host, settings.metrics_port, collectors=[collect_metrics]
+        )
+        lifecycle.on_stop("metrics", metrics.cleanup)
+
+    # соседние процессы сообщают об изменённых напоминаниях
+    reminder_cache.start()
+    lifecycle.on_stop("reminder cache", reminder_cache.stop)
+
+    if "delivery" in roles:
+        delivery_queue.start()
+        lifecycle.on_stop("delivery queue", lambda: delivery_queue.stop(lifecycle.remaining()))
+
+        worker = DeliveryWorker(consumer=settings.worker_name)
+        worker.start()
+        # оставляем секунду на возврат недоставленного в стрим
+        lifecycle.on_stop("delivery worker", lambda: worker.stop(max(lifecycle.remaining() - 1, 0)))
+
+    if "scheduler" in roles:
+        await start_scheduler()
+        await start_dispatcher()
+        lifecycle.on_stop("scheduler", lambda: stop_dispatcher(lifecycle.remaining()))
+
+    if "updates" in roles:
+        dp = Dispatcher(storage=build_fsm_storage())
+        # разные чаты — параллельно, апдейты одного чата — по очереди
+        dp.update.outer_middleware(ChatExecutorMiddleware(update_executor))
+        throttling = ThrottlingMiddleware(rate_limiter)
+        for handlers in (router, bulk_router):
+            dp.include_router(handlers)
+            handlers.message.middleware(throttling)
+            handlers.callback_query.middleware(throttling)
+            handlers.message.middleware(HandlerMetricsMiddleware())
+            handlers.callback_query.middleware(HandlerMetricsMiddleware())
+        lifecycle.on_stop("fsm storage", dp.storage.close)
+
+        if settings.bot_mode == "webhook":
+            stop_webhook = await start_webhook(dp, bot)
+            lifecycle.on_stop("webhook", lambda: stop_webhook(lifecycle.remaining()))
+        else:
+            await start_polling(dp, lifecycle)
 
-    dp = Dispatcher(storage=MemoryStorage())
-    dp.include_router(router)
-    await bot.delete_webhook(drop_pending_updates=True)
-    start_scheduler()
+        print(f"🤖 Бот запущен ({settings.bot_mode})")
+    else:
+        print(f"🤖 Воркер запущен ({', '.join(sorted(roles))})")
 
-    print("🤖 Бот запущен (polling)")
-    await dp.start_polling(bot)
+    await lifecycle.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,2 @@
+from .middlewares import HandlerMetricsMiddleware, TelegramMetricsMiddleware
+from .server import start_metrics_server
@@ -0,0 +1,112 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+
+handler_latency = Histogram(
+    "bot_handler_seconds",
+    "Time spent in an update handler",
+    ["handler"],
+)
+handler_errors = Counter(
+    "bot_handler_errors_total",
+    "Handlers that raised",
+    ["handler"],
+)
+
+updates_pending = Gauge(
+    "bot_updates_pending",
+    "Updates queued or being handled by the chat executor",
+)
+updates_dropped = Counter(
+    "bot_updates_dropped_total",
+    "Updates dropped because their chat queue was full",
+)
+updates_throttled = Counter(
+    "bot_updates_throttled_total",
+    "Updates rejected by the per-user rate limit",
+    ["action"],
+)
+
+telegram_latency = Histogram(
+    "telegram_api_seconds",
+    "Bot API call latency",
+    ["method"],
+)
+telegram_requests = Counter(
+    "telegram_api_requests_total",
+    "Bot API calls by result code",
+    ["method", "code"],
+)
+
+redis_latency = Histogram(
+    "redis_command_seconds",
+    "Redis command latency as seen by AsyncRedisOverride",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+cache_requests = Counter(
+    "reminder_cache_requests_total",
+    "Reminder cache lookups by result",
+    ["result"],
+)
+
+firing_lag = Histogram(
+    "reminder_firing_lag_seconds",
+    "Delivery time minus scheduled run time",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+reminders_sent = Counter(
+    "reminders_sent_total",
+    "Reminder notifications delivered",
+)
+reminders_coalesced = Counter(
+    "reminders_coalesced_total",
+    "Reminders delivered inside a digest message",
+)
+delivery_outcomes = Counter(
+    "reminder_runs_total",
+    "Reminder runs by outcome recorded in the delivery log",
+    ["outcome"],
+)
+
+scheduled_reminders = Gauge(
+    "reminders_scheduled",
+    "Reminders in the time-wheel schedule",
+)
+catchup_backlog = Gauge(
+    "reminders_catchup_backlog",
+    "Missed-reminder notices waiting to be released",
+)
+reconciler_fixes = Counter(
+    "reconciler_fixes_total",
+    "Inconsistencies found by the background reconciler",
+    ["kind"],
+)
+retry_backlog = Gauge(
+    "reminders_retry_backlog",
+    "Failed reminder runs waiting for another attempt",
+)
+dead_letters = Gauge(
+    "reminders_dead_letters",
+    "Reminder runs that gave up retrying",
+)
+delivery_stream_length = Gauge(
+    "reminders_delivery_stream_length",
+    "Entries in the delivery stream",
+)
+apscheduler_jobs = Gauge(
+    "apscheduler_jobs",
+    "Jobs in the APScheduler job stores",
+)
+delivery_queue_depth = Gauge(
+    "delivery_queue_depth",
+    "Messages waiting in the in-process delivery queue",
+)
+delivery_in_flight = Gauge(
+    "delivery_in_flight",
+    "sendMessage calls in progress",
+)
+delivery_drain_rate = Gauge(
+    "delivery_drain_rate",
+    "Messages per second delivered over the last minute",
+)
@@ -0,0 +1,72 @@
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.types import TelegramObject
+
+from .base import handler_errors, handler_latency, telegram_latency, telegram_requests
+
+
+ERROR_CODES = {
+    TelegramBadRequest: "400",
+    TelegramUnauthorizedError: "401",
+    TelegramForbiddenError: "403",
+    TelegramNotFound: "404",
+    TelegramConflictError: "409",
+    TelegramEntityTooLarge: "413",
+    TelegramRetryAfter: "429",
+    TelegramServerError: "5xx",
+    TelegramNetworkError: "network",
+}
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.labels(name).inc()
+            raise
+        finally:
+            handler_latency.labels(name).observe(time.perf_counter() - started)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            response = await make_request(bot, method)
+        except Exception as e:
+            code = next(
+                (code for error, code in ERROR_CODES.items() if isinstance(e, error)),
+                type(e).__name__,
+            )
+            telegram_requests.labels(name, code).inc()
+            raise
+        else:
+            telegram_requests.labels(name, "200").inc()
+            return response
+        finally:
+            telegram_latency.labels(name).observe(time.perf_counter() - started)
@@ -0,0 +1,36 @@
+import logging
+from collections.abc import Awaitable, Callable
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+
+logger = logging.getLogger(__name__)
+
+
+async def start_metrics_server(
+    host: str,
+    port: int,
+    collectors: list[Callable[[], Awaitable[None]]] = (),
+) -> web.AppRunner:
+    """Serves ``/metrics``; ``collectors`` refresh gauges right before each scrape."""
+
+    async def handle(request: web.Request) -> web.Response:
+        for collect in collectors:
+            try:
+                await collect()
+            except Exception:
+                logger.exception("Metrics collector %s failed", collect.__name__)
+
+        return web.Response(
+            body=generate_latest(),
+            headers={"Content-Type": CONTENT_TYPE_LATEST},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -1,19 +1,31 @@
+import asyncio
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+)
 from apscheduler.executors.asyncio import AsyncIOExecutor
-from apscheduler.jobstores.redis import RedisJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from config import settings
+from storage import redis_client
+from .jobstore import AsyncRedisJobStore
 
 
+jobstore = AsyncRedisJobStore(
+    redis_client.connection_pool,
+    jobs_key="apscheduler.jobs",
+    run_times_key="apscheduler.run_times",
+)
+
 jobstores = {
-    "default": RedisJobStore(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        password=settings.redis_password,
-        db=settings.redis_db,
-        jobs_key="apscheduler.jobs",
-        run_times_key="apscheduler.run_times"
-    )
+    "default": jobstore,
+    # служебные job'ы процесса (диспетчер), в Redis не сохраняются
+    "local": MemoryJobStore(),
 }
 
 executors = {
@@ -21,7 +33,9 @@ executors = {
 }
 
 job_defaults = {
-    "coalesce": False,
+    # пропущенные запуски схлопываются в один, если опоздали не больше grace
+    "coalesce": True,
+    "misfire_grace_time": settings.misfire_grace_seconds,
     "max_instances": 1
 }
 
@@ -29,9 +43,57 @@ scheduler = AsyncIOScheduler(
     jobstores=jobstores,
     executors=executors,
     job_defaults=job_defaults,
-    timezone="Europe/Moscow"
+    timezone=settings.default_timezone
+)
+
+
+class RunningJobs:
+    """Counts job runs handed to an executor and not finished yet, from scheduler events."""
+
+    def __init__(self):
+        self.count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def listener(self, event: JobEvent):
+        if event.code == EVENT_JOB_SUBMITTED:
+            # на каждое время запуска executor потом шлёт своё событие
+            self.count += len(event.scheduled_run_times)
+        else:
+            self.count = max(self.count - 1, 0)
+
+        if self.count:
+            self._idle.clear()
+        else:
+            self._idle.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Waits until no job is running; ``False`` if ``timeout`` ran out first."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+running_jobs = RunningJobs()
+scheduler.add_listener(
+    running_jobs.listener,
+    EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED,
 )
 
 
-def start_scheduler():
-    scheduler.start()
+async def start_scheduler():
+    # стартуем на паузе: job'ы выполняет только лидер (см. scheduler.dispatcher)
+    scheduler.start(paused=True)
+    await jobstore.load()
+
+
+async def stop_scheduler(timeout: float):
+    # новых запусков не берём, начатые (tick диспетчера и т.п.) доводим до конца
+    scheduler.pause()
+    await running_jobs.wait(timeout)
+
+    # отложенная запись job'ов в Redis, затем shutdown отменит writer
+    await jobstore.flush()
+    scheduler.shutdown(wait=False)
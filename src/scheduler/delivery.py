@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+from bot import bot
+from config import settings
+from storage import AsyncRedisOverride, redis_client
+
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: bucket; ARGV: rate, capacity. Время берём у Redis — часы процессов не сверены
+RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "at")
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - at, 0) * rate) - 1
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "at", tostring(now))
+-- ключ живёт, пока бакет не наполнится снова
+redis.call("EXPIRE", KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+if tokens >= 0 then
+    return "0"
+end
+return tostring(-tokens / rate)
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket kept in Redis, shared by every process that uses ``key``.
+
+    A token taken in advance leaves the bucket negative, and the caller
+    sleeps until its turn, so processes queue up for the rate together.
+    """
+
+    def __init__(self, client: AsyncRedisOverride, key: str, rate: float, capacity: float | None = None):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+
+    async def reserve(self, key: str | None = None) -> float:
+        """Takes a token and returns how long to wait before it may be used."""
+        return float(await self._reserve(keys=[key or self.key], args=[self.rate, self.capacity]))
+
+    async def acquire(self, key: str | None = None):
+        delay = await self.reserve(key)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class Delivery:
+    chat_id: int
+    text: str
+    kwargs: dict
+    future: asyncio.Future
+    attempt: int = 0
+    # токен чата уже взят — после отложенного ожидания второй не нужен
+    chat_reserved: bool = False
+
+    # отправитель мог уже отменить ожидание (например, воркер останавливается) —
+    # повторный set_* бросил бы InvalidStateError и убил бы воркер очереди
+    def set_result(self, result):
+        if not self.future.done():
+            self.future.set_result(result)
+
+    def set_exception(self, error: Exception):
+        if not self.future.done():
+            self.future.set_exception(error)
+
+
+class DeliveryQueue:
+    """
+    Smooths outgoing messages to stay under Telegram flood limits.
+
+    Messages pass a global and a per-chat token bucket. Both live in Redis,
+    so the rates hold across all ``delivery`` processes. A message whose chat
+    is over its rate is parked outside the workers until its token is due,
+    so one busy chat does not hold up the others; only the global bucket
+    makes a worker wait. A ``RetryAfter`` pauses the whole queue for the
+    requested time, network and 5xx errors are retried with exponential
+    backoff. ``workers`` bounds the number of concurrent ``sendMessage`` calls.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        global_rate: float,
+        chat_rate: float,
+        workers: int,
+        max_size: int,
+        max_attempts: int = 5,
+        rate_window: float = 60.0,
+    ):
+        self.global_bucket = TokenBucket(client, "delivery:rate", global_rate)
+        self.chat_bucket = TokenBucket(client, "delivery:rate:chat", chat_rate)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.rate_window = rate_window
+
+        self._queue: asyncio.Queue[Delivery] = asyncio.Queue(max_size)
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+        self._deferred: set[asyncio.Task] = set()
+        self._resume_at = 0.0
+
+        self.in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._sent_at: deque[float] = deque()
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"delivery-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 0):
+        """Sends what is queued or waiting for a retry within ``timeout``, cancels the rest."""
+        if self._tasks and timeout > 0:
+            try:
+                await asyncio.wait_for(self._drain(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Delivery queue stopped with %d messages unsent",
+                    self.depth + len(self._retries) + len(self._deferred),
+                )
+
+        tasks = [*self._tasks, *self._retries, *self._deferred]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+        # ждущие отправки узнают об отмене, а не висят вечно
+        while not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+            self._queue.task_done()
+
+    async def _drain(self):
+        while True:
+            await self._queue.join()
+            if not self._retries and not self._deferred:
+                return
+            await asyncio.wait({*self._retries, *self._deferred})
+
+    async def submit(self, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(Delivery(chat_id, text, kwargs, future))
+        return future
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        return await (await self.submit(chat_id, text, **kwargs))
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def drain_rate(self) -> float:
+        """Messages per second delivered over the last ``rate_window`` seconds."""
+        self._trim_sent()
+        return len(self._sent_at) / self.rate_window
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "retrying": len(self._retries),
+            "deferred": len(self._deferred),
+            "drain_rate": self.drain_rate(),
+        }
+
+    def _trim_sent(self):
+        border = time.monotonic() - self.rate_window
+        while self._sent_at and self._sent_at[0] < border:
+            self._sent_at.popleft()
+
+    async def _worker(self):
+        while True:
+            delivery = await self._queue.get()
+            try:
+                await self._deliver(delivery)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, delivery: Delivery):
+        if delivery.future.cancelled():
+            return
+
+        try:
+            if not delivery.chat_reserved:
+                delay = await self.chat_bucket.reserve(f"{self.chat_bucket.key}:{delivery.chat_id}")
+                delivery.chat_reserved = True
+                if delay:
+                    # чат над лимитом — ждём вне воркера, слот нужен другим чатам
+                    self._later(delivery, delay, self._deferred)
+                    return
+            await self.global_bucket.acquire()
+        except Exception as e:
+            # без Redis не знаем, можно ли слать, — отдаём ошибку отправителю
+            self.failed += 1
+            delivery.set_exception(e)
+            return
+
+        pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        self.in_flight += 1
+        try:
+            result = await bot.send_message(delivery.chat_id, delivery.text, **delivery.kwargs)
+        except TelegramRetryAfter as e:
+            logger.warning("Flood control, pausing delivery for %ss", e.retry_after)
+            self._resume_at = max(self._resume_at, time.monotonic() + e.retry_after)
+            self._retry(delivery, e, delay=0)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._retry(delivery, e, delay=min(2 ** delivery.attempt, 60))
+        except Exception as e:
+            self.failed += 1
+            delivery.set_exception(e)
+        else:
+            self.sent += 1
+            self._sent_at.append(time.monotonic())
+            self._trim_sent()
+            delivery.set_result(result)
+        finally:
+            self.in_flight -= 1
+
+    def _retry(self, delivery: Delivery, error: Exception, delay: float):
+        delivery.attempt += 1
+        if delivery.attempt >= self.max_attempts:
+            self.failed += 1
+            delivery.set_exception(error)
+            return
+
+        self.retried += 1
+        # новая попытка — новый токен чата
+        delivery.chat_reserved = False
+        # ждём вне воркера, чтобы backoff не занимал слот отправки
+        self._later(delivery, delay, self._retries)
+
+    def _later(self, delivery: Delivery, delay: float, tasks: set[asyncio.Task]):
+        task = asyncio.create_task(self._requeue(delivery, delay))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def _requeue(self, delivery: Delivery, delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            await self._queue.put(delivery)
+        except asyncio.CancelledError:
+            delivery.future.cancel()
+            raise
+
+
+delivery_queue = DeliveryQueue(
+    redis_client,
+    global_rate=settings.delivery_global_rate,
+    chat_rate=settings.delivery_chat_rate,
+    workers=settings.delivery_workers,
+    max_size=settings.delivery_queue_size,
+)
@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+
+# запас до лимита Telegram в 4096 символов на заголовок и нумерацию
+TEXT_LIMIT = 3500
+MAX_ITEMS = 20
+
+
+def coalesce(
+    fired: list[tuple[str, float, dict]],
+    window: float,
+) -> tuple[dict[str, float], list[list[tuple[str, float]]]]:
+    """
+    Splits fired runs into single deliveries and per-user digests.
+
+    Runs of one user that lie within ``window`` seconds of the first run of a
+    digest are merged while the message stays under ``TEXT_LIMIT`` characters
+    and ``MAX_ITEMS`` reminders. Fan-out reminders are always sent alone.
+    """
+    singles = {}
+    by_user = defaultdict(list)
+    for reminder_id, run_at, data in fired:
+        if data.get("recipients"):
+            singles[reminder_id] = run_at
+        else:
+            by_user[data["user_id"]].append((run_at, reminder_id, len(data["text"])))
+
+    digests = []
+
+    def flush(group: list[tuple[str, float]]):
+        if len(group) > 1:
+            digests.append(group)
+        elif group:
+            singles[group[0][0]] = group[0][1]
+
+    for runs in by_user.values():
+        group, size = [], 0
+        for run_at, reminder_id, length in sorted(runs):
+            if group and (
+                run_at - group[0][1] > window
+                or len(group) >= MAX_ITEMS
+                or size + length > TEXT_LIMIT
+            ):
+                flush(group)
+                group, size = [], 0
+            group.append((reminder_id, run_at))
+            size += length
+        flush(group)
+
+    return singles, digests
+
+
+def encode_runs(runs: list[tuple[str, float]]) -> str:
+    return " ".join(f"{reminder_id}:{run_at!r}" for reminder_id, run_at in runs)
+
+
+def decode_runs(value: str) -> list[tuple[str, float]]:
+    runs = []
+    for run in value.split():
+        reminder_id, run_at = run.rsplit(":", 1)
+        runs.append((reminder_id, float(run_at)))
+    return runs
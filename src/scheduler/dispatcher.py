@@ -0,0 +1,217 @@
+import logging
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from config import settings
+from storage import redis_client, reminders
+from storage.repository import SCHEDULE_KEY
+from .base import scheduler, stop_scheduler
+from .digest import coalesce
+from .leader import LeaderElection
+from .misfire import catch_up, release_missed_reminders
+from .reconciler import reconcile_step
+from .retries import release_retries, retry_queue
+from .stream import publish_digests, publish_due
+from .triggers import reminder_trigger, skip_missed
+
+
+logger = logging.getLogger(__name__)
+
+LEGACY_JOB_PREFIX = "reminder_"
+
+
+class TimeWheelDispatcher:
+    """
+    Keeps the next run time of every reminder as a score in one sorted set.
+
+    Once a minute the due bucket is pulled with a single range query, recurring
+    reminders are re-armed in one script call and the claimed batch is
+    published to the delivery stream.
+    """
+
+    def __init__(self, key: str = SCHEDULE_KEY, batch_size: int = 1000, digest_window: float = 0):
+        self.key = key
+        self.batch_size = batch_size
+        self.digest_window = digest_window
+
+    async def arm(self, reminder_id: str, run_at: datetime):
+        await redis_client.zadd(self.key, {reminder_id: run_at.timestamp()})
+
+    async def tick(self):
+        now = datetime.now(scheduler.timezone)
+
+        while True:
+            due = await redis_client.zrangebyscore(
+                self.key, "-inf", now.timestamp(),
+                start=0, num=self.batch_size, withscores=True,
+            )
+            if not due:
+                return
+
+            await self._fire(due, now)
+
+            if len(due) < self.batch_size:
+                return
+
+    async def _fire(self, due: list[tuple[str, float]], now: datetime):
+        records, broken = await self._read([reminder_id for reminder_id, _ in due])
+
+        entries = []
+        missed = {}
+        for (reminder_id, score), data in zip(due, records):
+            if not data:
+                entries.append((reminder_id, score, None))
+                continue
+
+            try:
+                trigger = reminder_trigger(data, scheduler.timezone)
+                previous = datetime.fromtimestamp(score, scheduler.timezone)
+                next_run, skipped = skip_missed(trigger, previous, now)
+            except Exception:
+                # битая запись каждый tick стояла бы первой и останавливала колесо для всех
+                logger.exception("Reminder %s cannot be scheduled, taking it off the schedule", reminder_id)
+                entries.append((reminder_id, score, None))
+                broken.add(reminder_id)
+                continue
+
+            entries.append((reminder_id, score, next_run.timestamp() if next_run else None))
+            if catch_up.is_missed(score, now.timestamp()):
+                missed[reminder_id] = (score, skipped + 1)
+
+        # сначала двигаем расписание, потом отправляем — повторный tick не задублирует
+        claimed = set(await reminders.claim_due(entries))
+        for reminder_id, score in due:
+            if reminder_id in broken and reminder_id in claimed:
+                await retry_queue.bury(reminder_id, score, now.timestamp())
+
+        await catch_up.defer(
+            {reminder_id: item for reminder_id, item in missed.items() if reminder_id in claimed},
+            now.timestamp(),
+        )
+        fired = [
+            (reminder_id, score, data)
+            for (reminder_id, score), data in zip(due, records)
+            if data and data.get("status") == "active"
+            and reminder_id in claimed and reminder_id not in missed and reminder_id not in broken
+        ]
+        if self.digest_window:
+            # напоминания одного пользователя на одну минуту — одним сообщением
+            singles, digests = coalesce(fired, self.digest_window)
+            await publish_digests(digests)
+        else:
+            singles = {reminder_id: score for reminder_id, score, _ in fired}
+        await publish_due(singles)
+
+    async def _read(self, reminder_ids: list[str]) -> tuple[list[dict | None], set[str]]:
+        """Reads the due records; ones that cannot be decoded come back as ``None`` and in the set."""
+        try:
+            return await reminders.get_many(reminder_ids), set()
+        except RedisError:
+            raise
+        except Exception:
+            # одна битая запись роняет всю пачку — перечитываем по одной
+            pass
+
+        records, broken = [], set()
+        for reminder_id in reminder_ids:
+            try:
+                records.append(await reminders.get(reminder_id))
+            except RedisError:
+                raise
+            except Exception:
+                logger.exception("Reminder %s cannot be decoded", reminder_id)
+                records.append(None)
+                broken.add(reminder_id)
+        return records, broken
+
+    async def adopt_legacy_jobs(self):
+        # переносим старые job'ы reminder_<uuid> из APScheduler в sorted set
+        adopted = {}
+        for job in scheduler.get_jobs():
+            if not job.id.startswith(LEGACY_JOB_PREFIX) or job.next_run_time is None:
+                continue
+            adopted[job.id.removeprefix(LEGACY_JOB_PREFIX)] = job.next_run_time.timestamp()
+            scheduler.remove_job(job.id)
+
+        if adopted:
+            await redis_client.zadd(self.key, adopted, nx=True)
+            logger.info("Moved %d legacy reminder jobs to the time wheel", len(adopted))
+
+
+dispatcher = TimeWheelDispatcher(digest_window=settings.digest_window)
+
+
+async def on_elected():
+    await dispatcher.adopt_legacy_jobs()
+    scheduler.resume()
+
+
+async def on_demoted():
+    if scheduler.running:
+        scheduler.pause()
+
+
+leader = LeaderElection(
+    redis_client,
+    key="scheduler:leader",
+    lease=settings.leader_lease_seconds,
+    on_elected=on_elected,
+    on_demoted=on_demoted,
+)
+
+
+async def dispatch_due_reminders():
+    await dispatcher.tick()
+
+
+async def start_dispatcher():
+    scheduler.add_job(
+        dispatch_due_reminders,
+        "cron",
+        second=0,
+        id="reminders_dispatcher",
+        jobstore="local",
+        coalesce=True,
+        misfire_grace_time=None,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        release_missed_reminders,
+        "interval",
+        seconds=5,
+        id="reminders_catch_up",
+        jobstore="local",
+        coalesce=True,
+        misfire_grace_time=None,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        release_retries,
+        "interval",
+        seconds=5,
+        id="reminders_retries",
+        jobstore="local",
+        coalesce=True,
+        misfire_grace_time=None,
+        replace_existing=True,
+    )
+    if settings.reconcile_interval:
+        scheduler.add_job(
+            reconcile_step,
+            "interval",
+            seconds=settings.reconcile_interval,
+            id="reminders_reconciler",
+            jobstore="local",
+            coalesce=True,
+            misfire_grace_time=None,
+            replace_existing=True,
+        )
+    # планировщик работает только у лидера
+    leader.start()
+
+
+async def stop_dispatcher(timeout: float):
+    await stop_scheduler(timeout)
+    # отдаём лидерство сразу, не дожидаясь конца lease
+    await leader.stop()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError
+
+from metrics.base import reminders_sent
+from storage import redis_client, reminders
+from .delivery import delivery_queue
+
+
+logger = logging.getLogger(__name__)
+
+MAX_RECIPIENTS = 1000
+PROGRESS_TTL = 7 * 86400
+ROUNDS_FIELD = "_rounds"
+MEMBER_STATUSES = {"creator", "administrator", "member"}
+
+
+def parse_recipients(value: str) -> list[int]:
+    """Chat ids separated by spaces, commas or semicolons."""
+    try:
+        recipients = {int(chat_id) for chat_id in re.split(r"[\s,;]+", value) if chat_id}
+    except ValueError:
+        raise ValueError("получатели — это числовые id чатов") from None
+    if len(recipients) > MAX_RECIPIENTS:
+        raise ValueError(f"не больше {MAX_RECIPIENTS} получателей")
+    return sorted(recipients)
+
+
+async def foreign_recipients(bot: Bot, user_id: int, recipients: list[int], concurrency: int = 10) -> list[int]:
+    """
+    Chats among ``recipients`` that ``user_id`` is not a member of.
+
+    A user may only send to their own chat and to chats they belong to,
+    otherwise a fan-out reminder would let anyone spam every chat the bot
+    can reach. Chats the bot cannot look into count as foreign.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def is_member(chat_id: int) -> bool:
+        if chat_id == user_id:
+            return True
+        async with slots:
+            try:
+                member = await bot.get_chat_member(chat_id, user_id)
+            except TelegramAPIError:
+                return False
+        return member.status in MEMBER_STATUSES or getattr(member, "is_member", False)
+
+    checks = await asyncio.gather(*(is_member(chat_id) for chat_id in recipients))
+    return [chat_id for chat_id, allowed in zip(recipients, checks) if not allowed]
+
+
+def progress_key(reminder_id: str, run_at: float) -> str:
+    return f"fanout:{reminder_id}:{run_at!r}"
+
+
+class PartialDelivery(Exception):
+    """Some recipients hit a transient error; the run has to be resumed."""
+
+
+@dataclass
+class FanOutResult:
+    sent: int = 0
+    failed: int = 0
+    pending: int = 0
+
+
+class FanOut:
+    """
+    Sends one run of a fan-out reminder to every recipient.
+
+    Progress of the run is kept in ``fanout:<id>:<run_at>``: delivered chats
+    map to ``ok``, chats that can never be reached map to the error. A
+    resumed run skips both and retries only the rest. After ``max_rounds``
+    attempts transient errors are recorded as failures too.
+    """
+
+    def __init__(self, chunk_size: int = 50, max_rounds: int = 3):
+        self.chunk_size = chunk_size
+        self.max_rounds = max_rounds
+
+    async def send(self, reminder_id: str, run_at: float, text: str) -> FanOutResult:
+        key = progress_key(reminder_id, run_at)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, ROUNDS_FIELD, 1)
+            pipe.expire(key, PROGRESS_TTL)
+            pipe.hgetall(key)
+            rounds, _, progress = await pipe.execute()
+
+        result = FanOutResult()
+        pending = [
+            chat_id for chat_id in await reminders.recipients(reminder_id)
+            if str(chat_id) not in progress
+        ]
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            sends = await asyncio.gather(
+                *(delivery_queue.send_message(chat_id, text) for chat_id in chunk),
+                return_exceptions=True,
+            )
+
+            # фиксируем прогресс после каждой пачки — при рестарте повторим только хвост
+            done = {}
+            for chat_id, sent in zip(chunk, sends):
+                if not isinstance(sent, Exception):
+                    done[chat_id] = "ok"
+                    result.sent += 1
+                elif isinstance(sent, (TelegramForbiddenError, TelegramBadRequest)) or rounds >= self.max_rounds:
+                    logger.warning("Fan-out %s to %s failed: %s", reminder_id, chat_id, sent)
+                    done[chat_id] = f"{type(sent).__name__}: {sent}"[:200]
+                    result.failed += 1
+                else:
+                    result.pending += 1
+            if done:
+                await redis_client.hset(key, mapping=done)
+
+        reminders_sent.inc(result.sent)
+        return result
+
+
+fan_out = FanOut()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import pickle
+
+from apscheduler.job import Job
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.util import datetime_to_utc_timestamp
+from redis.asyncio import ConnectionPool, Redis
+from redis.client import NEVER_DECODE
+
+
+logger = logging.getLogger(__name__)
+
+_SET = "set"
+_DEL = "del"
+_CLEAR = "clear"
+
+
+class AsyncRedisJobStore(MemoryJobStore):
+    """
+    Job store on top of ``redis.asyncio``.
+
+    APScheduler calls job store methods synchronously, so every read is served
+    from an in-process index and every write is queued and flushed to Redis by
+    a single background writer in MULTI/EXEC pipelines. The event loop never
+    waits on Redis inside ``scheduler.add_job``/``remove_job``. A batch that
+    fails to flush is retried with backoff before the next one is written.
+
+    The Redis layout is the same as in ``RedisJobStore``, so jobs persisted
+    by it are picked up as is.
+    """
+
+    def __init__(
+        self,
+        connection_pool: ConnectionPool,
+        jobs_key: str = "apscheduler.jobs",
+        run_times_key: str = "apscheduler.run_times",
+        prefetch_batch_size: int = 500,
+        pickle_protocol: int = pickle.HIGHEST_PROTOCOL,
+    ):
+        super().__init__()
+        self.redis = Redis(connection_pool=connection_pool)
+        self.jobs_key = jobs_key
+        self.run_times_key = run_times_key
+        self.prefetch_batch_size = prefetch_batch_size
+        self.pickle_protocol = pickle_protocol
+
+        self._queue: asyncio.Queue | None = None
+        self._writer: asyncio.Task | None = None
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def shutdown(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        self._jobs = []
+        self._jobs_index = {}
+
+    # ---------- sync interface (in-memory + write-behind) ----------
+
+    def add_job(self, job: Job):
+        super().add_job(job)
+        self._enqueue(_SET, job)
+
+    def update_job(self, job: Job):
+        super().update_job(job)
+        self._enqueue(_SET, job)
+
+    def remove_job(self, job_id: str):
+        super().remove_job(job_id)
+        self._enqueue(_DEL, job_id)
+
+    def remove_all_jobs(self):
+        super().remove_all_jobs()
+        self._enqueue(_CLEAR, None)
+
+    # ---------- async interface ----------
+
+    async def load(self):
+        """Prefetches persisted jobs into the index in batches."""
+        cursor = 0
+        while True:
+            cursor, states = await self.redis.execute_command(
+                "HSCAN", self.jobs_key, cursor, "COUNT", self.prefetch_batch_size,
+                **{NEVER_DECODE: True},
+            )
+            for job in self._reconstitute_jobs(states.items()):
+                if job.id not in self._jobs_index:
+                    MemoryJobStore.add_job(self, job)
+            if not cursor:
+                break
+
+    async def flush(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    # ---------- internals ----------
+
+    def _dump(self, job: Job):
+        state = pickle.dumps(job.__getstate__(), self.pickle_protocol)
+        run_time = datetime_to_utc_timestamp(job.next_run_time)
+        return job.id, state, run_time
+
+    def _enqueue(self, op: str, payload):
+        if self._queue is None:
+            raise RuntimeError("Job store is not started")
+        if op == _SET:
+            payload = self._dump(payload)
+        self._queue.put_nowait((op, payload))
+
+    async def _write_loop(self):
+        while True:
+            ops = [await self._queue.get()]
+            while not self._queue.empty() and len(ops) < self.prefetch_batch_size:
+                ops.append(self._queue.get_nowait())
+
+            delay = 1
+            # пачку повторяем, пока не запишется, и только потом берём следующую —
+            # иначе индекс в памяти и Redis разойдутся, а порядок операций нарушится
+            while True:
+                try:
+                    await self._execute(ops)
+                    break
+                except Exception:
+                    logger.exception("Failed to flush %d job store operations, retrying in %ss", len(ops), delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30)
+            for _ in ops:
+                self._queue.task_done()
+
+    async def _execute(self, ops: list):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for op, payload in ops:
+                if op == _SET:
+                    job_id, state, run_time = payload
+                    pipe.hset(self.jobs_key, job_id, state)
+                    if run_time is not None:
+                        pipe.zadd(self.run_times_key, {job_id: run_time})
+                    else:
+                        pipe.zrem(self.run_times_key, job_id)
+                elif op == _DEL:
+                    pipe.hdel(self.jobs_key, payload)
+                    pipe.zrem(self.run_times_key, payload)
+                else:
+                    pipe.delete(self.jobs_key, self.run_times_key)
+            await pipe.execute()
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        job = Job.__new__(Job)
+        job.__setstate__(pickle.loads(job_state))
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _reconstitute_jobs(self, job_states) -> list[Job]:
+        jobs = []
+        for job_id, job_state in job_states:
+            if isinstance(job_id, bytes):
+                job_id = job_id.decode()
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except Exception:
+                logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                self._queue.put_nowait((_DEL, job_id))
+        return jobs
@@ -0,0 +1,127 @@
+import time
+
+from config import settings
+from metrics.base import delivery_outcomes
+from storage import AsyncRedisOverride, redis_client
+
+
+DELIVERY_LOG = "reminders:delivery_log"
+
+CLAIMED = "claimed"
+PENDING = "pending"
+SENT = "sent"
+
+
+# KEYS: ключи запусков; ARGV: lease_ms. Продлеваем только ещё не отправленные
+RENEW_SCRIPT = """
+local renewed = 0
+for _, key in ipairs(KEYS) do
+    if redis.call("GET", key) == "pending" then
+        redis.call("PEXPIRE", key, ARGV[1])
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+
+def fire_key(reminder_id: str, run_at: float) -> str:
+    return f"fired:{reminder_id}:{run_at!r}"
+
+
+class RunInProgress(Exception):
+    """Another worker holds the run; the entry has to be retried later."""
+
+
+class DeliveryJournal:
+    """
+    Idempotency keys for reminder runs plus an append-only delivery log.
+
+    A run is identified by the reminder id and its scheduled time. Before the
+    send ``fired:<id>:<run_at>`` is set to ``pending`` with a ``lease``, after
+    it the key turns ``sent`` for ``ttl`` seconds; a failed run drops the key
+    so a retry may claim it again. If a worker dies mid-send the lease expires
+    and the run can be claimed once more; a live worker keeps the leases of
+    its runs with ``renew`` while the sends wait for their turn.
+
+    Every outcome is appended to the ``reminders:delivery_log`` stream, trimmed
+    to about ``maxlen`` entries.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        log_key: str = DELIVERY_LOG,
+        maxlen: int = 100_000,
+        lease: float = 600,
+        ttl: float = 7 * 86400,
+    ):
+        self.client = client
+        self.log_key = log_key
+        self.maxlen = maxlen
+        self.lease_ms = int(lease * 1000)
+        self.ttl = int(ttl)
+        # запуски, которые этот процесс сейчас отправляет
+        self._held: set[tuple[str, float]] = set()
+        self._renew = client.register_script(RENEW_SCRIPT)
+
+    async def claim(self, reminder_id: str, run_at: float) -> str:
+        """Returns ``claimed`` if this call owns the run, else the state of the owner."""
+        return (await self.claim_many([(reminder_id, run_at)]))[0]
+
+    async def claim_many(self, runs: list[tuple[str, float]]) -> list[str]:
+        async with self.client.pipeline(transaction=True) as pipe:
+            for reminder_id, run_at in runs:
+                key = fire_key(reminder_id, run_at)
+                pipe.set(key, PENDING, nx=True, px=self.lease_ms)
+                pipe.get(key)
+            results = await pipe.execute()
+        states = [
+            CLAIMED if claimed else state or PENDING
+            for claimed, state in zip(results[::2], results[1::2])
+        ]
+        self._held.update(run for run, state in zip(runs, states) if state == CLAIMED)
+        return states
+
+    async def complete(self, reminder_id: str, run_at: float, outcome: str, error: str = ""):
+        """Marks the run ``sent`` (or releases it on failure) and logs the outcome."""
+        await self.complete_many([(reminder_id, run_at)], outcome, error)
+
+    async def complete_many(self, runs: list[tuple[str, float]], outcome: str, error: str = ""):
+        self._held.difference_update(runs)
+        async with self.client.pipeline(transaction=True) as pipe:
+            for reminder_id, run_at in runs:
+                key = fire_key(reminder_id, run_at)
+                if outcome == SENT:
+                    pipe.set(key, SENT, ex=self.ttl)
+                elif outcome != "duplicate":
+                    pipe.delete(key)
+                # одинаковый набор полей — Redis хранит имена один раз на узел стрима
+                pipe.xadd(
+                    self.log_key,
+                    {
+                        "reminder_id": reminder_id,
+                        "run_at": repr(run_at),
+                        "outcome": outcome,
+                        "lag": f"{time.time() - run_at:.3f}",
+                        "error": error[:200],
+                    },
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+            await pipe.execute()
+        delivery_outcomes.labels(outcome).inc(len(runs))
+
+    async def release(self, reminder_id: str, run_at: float):
+        self._held.discard((reminder_id, run_at))
+        await self.client.delete(fire_key(reminder_id, run_at))
+
+    async def renew(self) -> int:
+        """Extends the leases of all runs this process is still sending."""
+        if not self._held:
+            return 0
+        keys = [fire_key(reminder_id, run_at) for reminder_id, run_at in self._held]
+        return await self._renew(keys=keys, args=[self.lease_ms])
+
+
+journal = DeliveryJournal(redis_client, maxlen=settings.delivery_log_size)
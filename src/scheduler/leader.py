@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+
+from storage import AsyncRedisOverride
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS: lock; ARGV: token, lease_ms
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: lock; ARGV: token
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Redis lock with a lease.
+
+    The holder renews the lease every ``lease / 3`` seconds. If renewal fails
+    (the lease expired or Redis is unreachable) the process steps down, and
+    any other candidate takes over once the lease runs out. A failing
+    ``on_elected`` also makes it step down and release the lock; it runs for
+    leader again on the next round.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        key: str,
+        lease: float,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ):
+        self.client = client
+        self.key = key
+        self.lease_ms = int(lease * 1000)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.token = uuid.uuid4().hex
+        self.is_leader = False
+
+        self._renew = client.register_script(RENEW_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name="leader-election")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self.is_leader:
+            await self._release(keys=[self.key], args=[self.token])
+            await self._set_leader(False)
+
+    async def _run(self):
+        interval = self.lease_ms / 3000
+        while True:
+            try:
+                if self.is_leader:
+                    held = await self._renew(keys=[self.key], args=[self.token, self.lease_ms])
+                else:
+                    held = await self.client.set(self.key, self.token, nx=True, px=self.lease_ms)
+            except Exception:
+                logger.exception("Leader election round failed")
+                held = False
+
+            try:
+                await self._set_leader(bool(held))
+            except Exception:
+                # упавший колбэк не должен убить цикл выборов с is_leader=True
+                logger.exception("Leadership change failed, stepping down")
+                await self._step_down()
+            await asyncio.sleep(interval)
+
+    async def _step_down(self):
+        self.is_leader = False
+        for name, action in (
+            ("on_demoted", self.on_demoted),
+            ("release", lambda: self._release(keys=[self.key], args=[self.token])),
+        ):
+            try:
+                await action()
+            except Exception:
+                logger.exception("Stepping down: %s failed", name)
+
+    async def _set_leader(self, value: bool):
+        if value == self.is_leader:
+            return
+
+        self.is_leader = value
+        if value:
+            logger.info("Became scheduler leader")
+            await self.on_elected()
+        else:
+            logger.warning("Lost scheduler leadership")
+            await self.on_demoted()
@@ -0,0 +1,71 @@
+import logging
+import time
+
+from config import settings
+from storage import redis_client, reminders
+from .stream import release_due
+
+
+logger = logging.getLogger(__name__)
+
+CATCHUP_KEY = "reminders:catchup"
+
+
+class CatchUpPolicy:
+    """
+    Decides what happens to reminders the dispatcher finds too late.
+
+    A reminder that is more than ``grace`` seconds late gets a single "missed"
+    notice no matter how many runs were skipped, and the skipped count is kept
+    in its ``missed_runs`` field. The notices are parked in a sorted set and
+    released at most ``rate`` per second: new notices queue up behind the ones
+    already parked, so batches of one tick or of later ticks never share slots.
+    """
+
+    def __init__(self, grace: float, rate: float, key: str = CATCHUP_KEY):
+        self.grace = grace
+        self.rate = rate
+        self.key = key
+
+    def is_missed(self, run_at: float, now: float) -> bool:
+        return now - run_at > self.grace
+
+    async def defer(self, missed: dict[str, tuple[float, int]], now: float):
+        """``missed`` maps reminder id to (scheduled run time, number of missed runs)."""
+        if not missed:
+            return
+
+        await reminders.record_missed(
+            {reminder_id: runs for reminder_id, (_, runs) in missed.items()}, now
+        )
+
+        # дефер зовёт только диспетчер-лидер, последовательно — гонки за хвост нет
+        last = await redis_client.zrange(self.key, -1, -1, withscores=True)
+        slots = self.slots(len(missed), now, last[0][1] if last else None)
+        await redis_client.zadd(self.key, {
+            f"{reminder_id}:{runs}:{run_at!r}": slot
+            for slot, (reminder_id, (run_at, runs)) in zip(slots, missed.items())
+        })
+        logger.warning(
+            "Deferred %d missed reminders (%d missed runs), backlog drains in %.0fs",
+            len(missed), sum(runs for _, runs in missed.values()), slots[-1] - now,
+        )
+
+    def slots(self, count: int, now: float, last: float | None = None) -> list[float]:
+        """Release times of ``count`` notices queued behind a backlog that ends at ``last``."""
+        spacing = 1 / self.rate
+        start = now if last is None else max(now, last + spacing)
+        return [start + i * spacing for i in range(count)]
+
+    async def release(self, now: float) -> int:
+        return await release_due(self.key, ["reminder_id", "missed", "run_at"], now)
+
+
+catch_up = CatchUpPolicy(
+    grace=settings.misfire_grace_seconds,
+    rate=settings.catchup_rate,
+)
+
+
+async def release_missed_reminders():
+    await catch_up.release(time.time())
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from config import settings
+from metrics.base import reconciler_fixes
+from storage import AsyncRedisOverride, redis_client, reminders
+from storage.codec import CODECS, codec_for
+from storage.repository import SCHEDULE_KEY, reminder_key, user_reminders_key
+from .base import scheduler
+from .triggers import reminder_trigger
+
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "reconcile:state"
+REPORT_KEY = "reconcile:report"
+
+# KEYS: index (set или sorted set), записи...; ARGV: SREM|ZREM, участники...
+PRUNE_SCRIPT = """
+local removed = 0
+for i = 2, #KEYS do
+    if redis.call("EXISTS", KEYS[i]) == 0 then
+        removed = removed + redis.call(ARGV[1], KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+# KEYS: пары (recipients, запись)
+DROP_ORPHANS_SCRIPT = """
+local removed = 0
+for i = 1, #KEYS, 2 do
+    if redis.call("EXISTS", KEYS[i + 1]) == 0 then
+        removed = removed + redis.call("DEL", KEYS[i])
+    end
+end
+return removed
+"""
+
+STAGES = (
+    *(("records", f"{codec.prefix}*") for codec in CODECS.values()),
+    ("users", user_reminders_key("*")),
+    ("schedule", SCHEDULE_KEY),
+    ("recipients", "recipients:*"),
+)
+
+FIX_KINDS = (
+    "unindexed",
+    "unscheduled",
+    "stale",
+    "dangling_index",
+    "dangling_schedule",
+    "orphan_recipients",
+    "corrupt",
+)
+
+
+@dataclass
+class Progress:
+    stage: int = 0
+    cursor: int = 0
+    # users: ключи со страницы SCAN, которые ещё надо пройти SSCAN'ом
+    keys: list[str] = field(default_factory=list)
+    member_cursor: int = 0
+    found: dict[str, int] = field(default_factory=dict)
+    started_at: float = 0
+
+
+class Reconciler:
+    """
+    Walks the keyspace a little at a time and fixes drift between reminder
+    records, the per-user sets, the schedule and recipient sets.
+
+    Each ``step`` issues at most about ``ops`` Redis commands and stops after
+    ``max_seconds``; the position is kept in ``reconcile:state``, so the walk
+    survives restarts and leader changes. Only ``SCAN``/``SSCAN``/``ZSCAN``
+    are used, and removals re-check the record inside a script, so a
+    reminder created meanwhile is never touched.
+
+    Fixes:
+
+    - ``unindexed`` — record missing from its user's set: added back
+    - ``unscheduled`` — record with a future run but no schedule entry: re-armed
+    - ``stale`` — one-off record whose time passed ``stale_after`` seconds ago
+      and that is not scheduled: deleted
+    - ``dangling_index`` / ``dangling_schedule`` — entries without a record: removed
+    - ``orphan_recipients`` — recipient sets without a record: removed
+    - ``corrupt`` — records that cannot be read: only reported
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        ops: int = 500,
+        max_seconds: float = 0.2,
+        page: int = 100,
+        stale_after: float = 7 * 86400,
+    ):
+        self.client = client
+        self.ops = ops
+        self.max_seconds = max_seconds
+        self.page = page
+        self.stale_after = stale_after
+
+        self._prune = client.register_script(PRUNE_SCRIPT)
+        self._drop_orphans = client.register_script(DROP_ORPHANS_SCRIPT)
+        self._stages = {
+            "records": self._records,
+            "users": self._users,
+            "schedule": self._schedule,
+            "recipients": self._recipients,
+        }
+
+    async def step(self) -> dict | None:
+        """Advances the walk within the budget; returns the report when a pass ends."""
+        progress = await self._load()
+        if not progress.started_at:
+            progress.started_at = time.time()
+
+        found = Counter(progress.found)
+        report = None
+        ops = 1
+        started = time.monotonic()
+        while ops < self.ops and time.monotonic() - started < self.max_seconds:
+            kind, pattern = STAGES[progress.stage]
+            spent, done = await self._stages[kind](progress, pattern, found)
+            ops += spent
+            if not done:
+                continue
+
+            progress = Progress(stage=progress.stage + 1, started_at=progress.started_at)
+            if progress.stage == len(STAGES):
+                report = await self._finish(found, progress.started_at)
+                progress, found = Progress(), Counter()
+                break
+
+        progress.found = dict(found)
+        await self.client.set(STATE_KEY, json.dumps(asdict(progress)))
+        return report
+
+    async def run_pass(self) -> dict:
+        while (report := await self.step()) is None:
+            pass
+        return report
+
+    async def _load(self) -> Progress:
+        state = await self.client.get(STATE_KEY)
+        if not state:
+            return Progress()
+        try:
+            progress = Progress(**json.loads(state))
+        except (TypeError, ValueError):
+            return Progress()
+        # набор стадий мог поменяться между версиями
+        return progress if progress.stage < len(STAGES) else Progress()
+
+    async def _finish(self, found: Counter, started_at: float) -> dict:
+        report = {
+            **{kind: found.get(kind, 0) for kind in FIX_KINDS},
+            "finished_at": round(time.time()),
+            "duration": round(time.time() - started_at),
+        }
+        await self.client.hset(REPORT_KEY, mapping=report)
+        fixed = {kind: count for kind, count in found.items() if count}
+        if fixed:
+            logger.warning("Reconciler pass fixed %s", fixed)
+        else:
+            logger.info("Reconciler pass found no drift in %ss", report["duration"])
+        return report
+
+    def _count(self, found: Counter, kind: str, count: int = 1):
+        if count:
+            found[kind] += count
+            reconciler_fixes.labels(kind).inc(count)
+
+    async def _records(self, progress: Progress, pattern: str, found: Counter) -> tuple[int, bool]:
+        cursor, keys = await self.client.scan(progress.cursor, match=pattern, count=self.page)
+        progress.cursor = int(cursor)
+        prefix = pattern.removesuffix("*")
+        # "r:*" и "reminder:*" не пересекаются, но id проверяем по форме
+        reminder_ids = [
+            key.removeprefix(prefix) for key in keys
+            if codec_for(key.removeprefix(prefix)).prefix == prefix
+        ]
+        spent = 1
+        if reminder_ids:
+            spent += await self._check_records(reminder_ids, found)
+        return spent, progress.cursor == 0
+
+    async def _check_records(self, reminder_ids: list[str], found: Counter) -> int:
+        raw = await self.client.hgetall_many([reminder_key(rid) for rid in reminder_ids], raw=True)
+        scores = await self.client.zmscore(SCHEDULE_KEY, reminder_ids)
+
+        records = []
+        for rid, fields, score in zip(reminder_ids, raw, scores):
+            if not fields:
+                continue
+            try:
+                data = codec_for(rid).decode(fields)
+                int(data["user_id"])
+            except Exception:
+                self._count(found, "corrupt")
+                continue
+            records.append((rid, data, score))
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for rid, data, _ in records:
+                pipe.sismember(user_reminders_key(data["user_id"]), rid)
+            indexed = await pipe.execute()
+
+        now = datetime.now(scheduler.timezone)
+        unindexed, unscheduled, stale = [], {}, []
+        for (rid, data, score), member in zip(records, indexed):
+            if not member:
+                unindexed.append((rid, data["user_id"]))
+            if score is not None or data.get("status") == "done":
+                continue
+            try:
+                next_run = reminder_trigger(data, scheduler.timezone).get_next_fire_time(None, now)
+            except Exception:
+                self._count(found, "corrupt")
+                continue
+            if next_run is not None and next_run > now:
+                unscheduled[rid] = next_run.timestamp()
+            elif data["type"] == "once" and (next_run is None or now.timestamp() - next_run.timestamp() > self.stale_after):
+                stale.append(rid)
+
+        if unindexed or unscheduled:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for rid, user_id in unindexed:
+                    pipe.sadd(user_reminders_key(user_id), rid)
+                if unscheduled:
+                    # NX: не перетираем время, выставленное за это время диспетчером
+                    pipe.zadd(SCHEDULE_KEY, unscheduled, nx=True)
+                await pipe.execute()
+        for rid in stale:
+            await reminders.delete(rid)
+
+        self._count(found, "unindexed", len(unindexed))
+        self._count(found, "unscheduled", len(unscheduled))
+        self._count(found, "stale", len(stale))
+        return 2 + 2 * len(records) + len(unindexed) + len(unscheduled) + 3 * len(stale)
+
+    async def _users(self, progress: Progress, pattern: str, found: Counter) -> tuple[int, bool]:
+        spent = 0
+        if not progress.keys:
+            cursor, keys = await self.client.scan(progress.cursor, match=pattern, count=self.page)
+            progress.cursor = int(cursor)
+            progress.keys = list(keys)
+            spent += 1
+            if not progress.keys:
+                return spent, progress.cursor == 0
+
+        key = progress.keys[0]
+        cursor, members = await self.client.sscan(key, progress.member_cursor, count=self.page)
+        progress.member_cursor = int(cursor)
+        if not progress.member_cursor:
+            progress.keys.pop(0)
+
+        removed = await self._prune_members(key, "SREM", members)
+        self._count(found, "dangling_index", removed)
+        spent += 1 + len(members)
+        return spent, progress.cursor == 0 and not progress.keys
+
+    async def _schedule(self, progress: Progress, key: str, found: Counter) -> tuple[int, bool]:
+        cursor, entries = await self.client.zscan(key, progress.cursor, count=self.page)
+        progress.cursor = int(cursor)
+        members = [member for member, _ in entries]
+
+        removed = await self._prune_members(key, "ZREM", members)
+        self._count(found, "dangling_schedule", removed)
+        return 1 + len(members), progress.cursor == 0
+
+    async def _recipients(self, progress: Progress, pattern: str, found: Counter) -> tuple[int, bool]:
+        cursor, keys = await self.client.scan(progress.cursor, match=pattern, count=self.page)
+        progress.cursor = int(cursor)
+
+        if keys:
+            pairs = []
+            for key in keys:
+                pairs += [key, reminder_key(key.removeprefix("recipients:"))]
+            self._count(found, "orphan_recipients", await self._drop_orphans(keys=pairs))
+        return 1 + len(keys), progress.cursor == 0
+
+    async def _prune_members(self, key: str, command: str, members: list[str]) -> int:
+        if not members:
+            return 0
+        return await self._prune(
+            keys=[key, *(reminder_key(member) for member in members)],
+            args=[command, *members],
+        )
+
+
+reconciler = Reconciler(redis_client, ops=settings.reconcile_ops)
+
+
+async def reconcile_step():
+    await reconciler.step()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run one full reconciler pass and print what it fixed")
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = await reconciler.run_pass()
+    for kind in FIX_KINDS:
+        print(f"{kind:>20}: {report[kind]}")
+    print(f"{'duration':>20}: {report['duration']}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+import logging
+import random
+import time
+
+from aiogram.exceptions import TelegramBadRequest
+
+from config import settings
+from storage import redis_client
+from .stream import release_due
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_KEY = "reminders:retries"
+DEAD_KEY = "reminders:dead"
+
+
+class RetryQueue:
+    """
+    Durable retries of reminder runs whose send failed.
+
+    A failed run is parked in the ``reminders:retries`` sorted set, scored by
+    the time of its next attempt: ``base * 2 ** attempt`` seconds capped at
+    ``max_delay``, of which a random half is jitter so runs that failed
+    together do not retry together. Due retries go back to the delivery
+    stream. A run that failed ``max_attempts`` times, or with an error that a
+    retry cannot fix, moves to ``reminders:dead``.
+    """
+
+    def __init__(
+        self,
+        base: float,
+        max_attempts: int,
+        max_delay: float = 3600,
+        dead_size: int = 10_000,
+        key: str = RETRY_KEY,
+        dead_key: str = DEAD_KEY,
+    ):
+        self.base = base
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.dead_size = dead_size
+        self.key = key
+        self.dead_key = dead_key
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def defer(
+        self,
+        reminder_id: str,
+        run_at: float,
+        attempt: int,
+        error: Exception,
+        missed: int = 0,
+    ) -> str:
+        """Schedules the next attempt; returns ``retry`` or ``dead``."""
+        now = time.time()
+        attempt += 1
+        if attempt >= self.max_attempts or isinstance(error, TelegramBadRequest):
+            await self.bury(reminder_id, run_at, now)
+            logger.error("Reminder %s run %r is dead after %d attempts: %s", reminder_id, run_at, attempt, error)
+            return "dead"
+
+        delay = self.backoff(attempt)
+        await redis_client.zadd(self.key, {f"{reminder_id}:{attempt}:{missed}:{run_at!r}": now + delay})
+        logger.warning("Reminder %s failed (%s), attempt %d in %.0fs", reminder_id, error, attempt + 1, delay)
+        return "retry"
+
+    async def bury(self, reminder_id: str, run_at: float, now: float):
+        """Records a run that will never be sent in ``reminders:dead``."""
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.dead_key, {f"{reminder_id}:{run_at!r}": now})
+            # храним только последние dead_size запусков
+            pipe.zremrangebyrank(self.dead_key, 0, -self.dead_size - 1)
+            await pipe.execute()
+
+    async def release(self, now: float) -> int:
+        return await release_due(self.key, ["reminder_id", "attempt", "missed", "run_at"], now)
+
+
+retry_queue = RetryQueue(
+    base=settings.retry_base_seconds,
+    max_attempts=settings.retry_max_attempts,
+)
+
+
+async def release_retries():
+    await retry_queue.release(time.time())
@@ -0,0 +1,41 @@
+import asyncio
+
+from metrics.base import (
+    apscheduler_jobs,
+    catchup_backlog,
+    delivery_drain_rate,
+    delivery_in_flight,
+    delivery_queue_depth,
+    delivery_stream_length,
+    dead_letters,
+    retry_backlog,
+    scheduled_reminders,
+)
+from storage import redis_client
+from storage.repository import SCHEDULE_KEY
+from .base import scheduler
+from .delivery import delivery_queue
+from .misfire import CATCHUP_KEY
+from .retries import DEAD_KEY, RETRY_KEY
+from .stream import DELIVERY_STREAM
+
+
+async def collect_metrics():
+    scheduled, catchup, stream, retries, dead = await asyncio.gather(
+        redis_client.zcard(SCHEDULE_KEY),
+        redis_client.zcard(CATCHUP_KEY),
+        redis_client.xlen(DELIVERY_STREAM),
+        redis_client.zcard(RETRY_KEY),
+        redis_client.zcard(DEAD_KEY),
+    )
+    scheduled_reminders.set(scheduled)
+    catchup_backlog.set(catchup)
+    delivery_stream_length.set(stream)
+    retry_backlog.set(retries)
+    dead_letters.set(dead)
+    apscheduler_jobs.set(len(scheduler.get_jobs()))
+
+    stats = delivery_queue.stats()
+    delivery_queue_depth.set(stats["depth"])
+    delivery_in_flight.set(stats["in_flight"])
+    delivery_drain_rate.set(stats["drain_rate"])
@@ -0,0 +1,60 @@
+from storage import redis_client
+from .digest import encode_runs
+
+
+DELIVERY_STREAM = "reminders:deliveries"
+DELIVERY_GROUP = "delivery"
+
+# KEYS: sorted set, stream; ARGV: now, limit, имена полей для частей члена через ":"
+# перенос в стрим и ZREM — одним скриптом: упавший XADD не теряет запуски
+RELEASE_SCRIPT = """
+local members = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+for _, member in ipairs(members) do
+    local entry = {}
+    local i = 3
+    for part in string.gmatch(member, "[^:]+") do
+        -- нулевые счётчики (missed у повтора) в запись не пишем
+        if part ~= "0" then
+            entry[#entry + 1] = ARGV[i]
+            entry[#entry + 1] = part
+        end
+        i = i + 1
+    end
+    redis.call("XADD", KEYS[2], "*", unpack(entry))
+    redis.call("ZREM", KEYS[1], member)
+end
+return #members
+"""
+
+_release = redis_client.register_script(RELEASE_SCRIPT)
+
+
+async def publish_due(due: dict[str, float]):
+    if not due:
+        return
+
+    await redis_client.xadd_many(
+        DELIVERY_STREAM,
+        [{"reminder_id": reminder_id, "run_at": run_at} for reminder_id, run_at in due.items()],
+    )
+
+
+async def release_due(key: str, fields: list[str], now: float, batch_size: int = 1000) -> int:
+    """
+    Moves members of sorted set ``key`` scored up to ``now`` to the delivery stream.
+
+    A member is the ``:``-joined values of ``fields``; each becomes one entry.
+    """
+    released = 0
+    while True:
+        count = await _release(keys=[key, DELIVERY_STREAM], args=[now, batch_size, *fields])
+        released += count
+        if count < batch_size:
+            return released
+
+
+async def publish_digests(digests: list[list[tuple[str, float]]]):
+    if not digests:
+        return
+
+    await redis_client.xadd_many(DELIVERY_STREAM, [{"digest": encode_runs(runs)} for runs in digests])
@@ -1,23 +1,165 @@
-from bot import bot
-from storage import redis_client
+import asyncio
+import logging
+import time
 
+from aiogram.exceptions import TelegramForbiddenError
 
-async def send_reminder(reminder_id: str):
-    data = await redis_client.hgetall(f"reminder:{reminder_id}")
+from bot.keyboards.reminder import digest_keyboard
+from metrics.base import firing_lag, reminders_coalesced, reminders_sent
+from storage import reminders
+from .delivery import delivery_queue
+from .fanout import PartialDelivery, fan_out
+from .journal import CLAIMED, SENT, RunInProgress, journal
+from .retries import retry_queue
+
+
+logger = logging.getLogger(__name__)
+
+
+async def send_reminder(
+    reminder_id: str,
+    data: dict | None = None,
+    missed: int = 0,
+    scheduled_at: float | None = None,
+    attempt: int = 0,
+):
+    if data is None:
+        data = await reminders.get(reminder_id)
 
     if not data or data.get("status") != "active":
         return
 
-    user_id = int(data["user_id"])
     text = data["text"]
     repeat_type = data["type"]
 
-    await bot.send_message(
-        user_id,
-        f"⏰ Напоминание:\n{text}"
-    )
+    if missed > 1:
+        header = f"⏰ Пропущенное напоминание (пропущено раз: {missed}):"
+    elif missed:
+        header = "⏰ Пропущенное напоминание:"
+    else:
+        header = "⏰ Напоминание:"
+
+    if scheduled_at is not None:
+        # один запуск — одна отправка, даже если запись из стрима пришла повторно
+        state = await journal.claim(reminder_id, scheduled_at)
+        if state == SENT:
+            await journal.complete(reminder_id, scheduled_at, "duplicate")
+            if repeat_type == "once":
+                await reminders.retire(reminder_id, data["run_at"])
+            return
+        if state != CLAIMED:
+            raise RunInProgress(f"Run {scheduled_at!r} of {reminder_id} is held by another worker")
+
+    try:
+        await _deliver(reminder_id, data, scheduled_at, f"{header}\n{text}")
+    except asyncio.CancelledError:
+        # остановка процесса: запуск подберёт другой воркер
+        if scheduled_at is not None:
+            await journal.release(reminder_id, scheduled_at)
+        raise
+    except PartialDelivery as e:
+        if scheduled_at is not None:
+            await journal.complete(reminder_id, scheduled_at, "partial", str(e))
+        raise
+    except Exception as e:
+        if scheduled_at is None:
+            raise
+        await _failed([(reminder_id, scheduled_at)], data, e, attempt=attempt, missed=missed)
+        return
+
+    if scheduled_at is not None:
+        await journal.complete(reminder_id, scheduled_at, SENT)
+        if not missed:
+            firing_lag.observe(time.time() - scheduled_at)
 
     # 🧹 если одноразовое — удаляем
     if repeat_type == "once":
-        await redis_client.delete(f"reminder:{reminder_id}")
-        await redis_client.srem(f"user:{user_id}:reminders", reminder_id)
+        await reminders.retire(reminder_id, data["run_at"])
+
+
+async def _deliver(reminder_id: str, data: dict, scheduled_at: float | None, message: str):
+    if data.get("recipients"):
+        # одно напоминание на много чатов; прогресс — на каждый запуск
+        result = await fan_out.send(reminder_id, scheduled_at or time.time(), message)
+        if result.pending:
+            raise PartialDelivery(f"{result.pending} recipients of {reminder_id} left for a retry")
+    else:
+        await delivery_queue.send_message(int(data["user_id"]), message)
+        reminders_sent.inc()
+
+
+async def _failed(runs: list[tuple[str, float]], data: dict, error: Exception, attempt: int = 0, missed: int = 0):
+    if isinstance(error, TelegramForbiddenError):
+        # бота заблокировали — не тратим на этот чат запросы, пока пользователь не вернётся
+        await journal.complete_many(runs, "forbidden", str(error))
+        deactivated = await reminders.set_user_status(int(data["user_id"]), "inactive", current="active")
+        logger.warning("User %s blocked the bot, deactivated %d reminders", data["user_id"], deactivated)
+        return
+
+    for reminder_id, scheduled_at in runs:
+        outcome = await retry_queue.defer(reminder_id, scheduled_at, attempt, error, missed=missed)
+        await journal.complete(reminder_id, scheduled_at, outcome, f"{type(error).__name__}: {error}")
+
+
+async def send_digest(items: list[tuple[str, dict | None, float]]):
+    """
+    Sends reminders of one user that fire together as a single message.
+
+    Every reminder keeps its own run: runs already sent are skipped, runs
+    held by another worker are left for a retry of the whole entry, a failed
+    send is retried reminder by reminder.
+    """
+    items = [(rid, data, run_at) for rid, data, run_at in items if data and data.get("status") == "active"]
+    if not items:
+        return
+
+    states = await journal.claim_many([(rid, run_at) for rid, _, run_at in items])
+    claimed = [item for item, state in zip(items, states) if state == CLAIMED]
+    duplicates = [item for item, state in zip(items, states) if state == SENT]
+    held = len(items) - len(claimed) - len(duplicates)
+
+    if duplicates:
+        await journal.complete_many([(rid, run_at) for rid, _, run_at in duplicates], "duplicate")
+    sent = bool(claimed) and await _send_digest(claimed)
+
+    # 🧹 одноразовые удаляем только после отправки
+    for rid, data, _ in [*duplicates, *(claimed if sent else [])]:
+        if data["type"] == "once":
+            await reminders.retire(rid, data["run_at"])
+
+    if held:
+        raise RunInProgress(f"{held} runs of a digest are held by another worker")
+
+
+async def _send_digest(items: list[tuple[str, dict, float]]) -> bool:
+    runs = [(rid, run_at) for rid, _, run_at in items]
+    owner = items[0][1]
+    lines = ["⏰ Напоминания:"]
+    lines += [f"{number}. {data['text']}" for number, (_, data, _) in enumerate(items, start=1)]
+
+    try:
+        await delivery_queue.send_message(
+            int(owner["user_id"]),
+            "\n\n".join(lines),
+            # одноразовые после отправки удаляются — кнопки только у повторяющихся
+            reply_markup=digest_keyboard([
+                (number, rid)
+                for number, (rid, data, _) in enumerate(items, start=1)
+                if data["type"] != "once"
+            ]),
+        )
+    except asyncio.CancelledError:
+        for rid, run_at in runs:
+            await journal.release(rid, run_at)
+        raise
+    except Exception as e:
+        await _failed(runs, owner, e)
+        return False
+
+    reminders_sent.inc(len(items))
+    reminders_coalesced.inc(len(items))
+    await journal.complete_many(runs, SENT)
+    now = time.time()
+    for _, run_at in runs:
+        firing_lag.observe(now - run_at)
+    return True
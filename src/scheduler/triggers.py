@@ -0,0 +1,115 @@
+from datetime import datetime, tzinfo
+from zoneinfo import ZoneInfo
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+
+from .base import scheduler
+
+
+REPEAT_TYPES = ("once", "daily", "weekly", "monthly", "yearly")
+
+
+def build_trigger(repeat_type: str, run_at: datetime, timezone: tzinfo) -> BaseTrigger:
+    if repeat_type == "once":
+        return DateTrigger(run_date=run_at, timezone=timezone)
+
+    if repeat_type == "daily":
+        # cron, а не interval: interval в часовых поясах с DST сдвигает время на час
+        return CronTrigger(
+            hour=run_at.hour,
+            minute=run_at.minute,
+            start_date=run_at,
+            timezone=timezone,
+        )
+
+    if repeat_type == "weekly":
+        return CronTrigger(
+            day_of_week=run_at.weekday(),
+            hour=run_at.hour,
+            minute=run_at.minute,
+            timezone=timezone,
+        )
+
+    if repeat_type == "monthly":
+        return CronTrigger(
+            day=run_at.day,
+            hour=run_at.hour,
+            minute=run_at.minute,
+            timezone=timezone,
+        )
+
+    if repeat_type == "yearly":
+        return CronTrigger(
+            month=run_at.month,
+            day=run_at.day,
+            hour=run_at.hour,
+            minute=run_at.minute,
+            timezone=timezone,
+        )
+
+    raise ValueError(f"Unknown repeat_type: {repeat_type}")
+
+
+def reminder_timezone(data: dict, default: tzinfo) -> tzinfo:
+    return ZoneInfo(data["tz"]) if data.get("tz") else default
+
+
+def reminder_trigger(data: dict, default: tzinfo) -> BaseTrigger:
+    timezone = reminder_timezone(data, default)
+    run_at = datetime.fromisoformat(data["run_at"])
+    if run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=timezone)
+    return build_trigger(data["type"], run_at.astimezone(timezone), timezone)
+
+
+def skip_missed(
+    trigger: BaseTrigger,
+    previous: datetime,
+    now: datetime,
+) -> tuple[datetime | None, int]:
+    # пропускаем все срабатывания, которые уже в прошлом, и считаем их
+    skipped = 0
+    run_time = trigger.get_next_fire_time(previous, now)
+    while run_time is not None and run_time <= now:
+        skipped += 1
+        run_time = trigger.get_next_fire_time(run_time, now)
+    return run_time, skipped
+
+
+def next_run_time(
+    trigger: BaseTrigger,
+    previous: datetime | None,
+    now: datetime,
+) -> datetime | None:
+    if previous is None:
+        return trigger.get_next_fire_time(None, now)
+    return skip_missed(trigger, previous, now)[0]
+
+
+def build_reminder(
+    *,
+    user_id: int,
+    text: str,
+    run_at: datetime,
+    repeat_type: str,
+) -> tuple[dict, datetime | None]:
+    """Returns the record to store and its first run (``None`` if it never fires)."""
+    if run_at.tzinfo is None:
+        run_at = run_at.replace(tzinfo=scheduler.timezone)
+    timezone = run_at.tzinfo
+
+    # проверяем тип повтора до записи в Redis
+    trigger = build_trigger(repeat_type, run_at, timezone)
+    first_run = next_run_time(trigger, None, datetime.now(timezone))
+
+    data = {
+        "user_id": user_id,
+        "text": text,
+        "run_at": run_at.isoformat(),
+        "type": repeat_type,
+        "status": "active",
+        "tz": str(timezone),
+    }
+    return data, first_run
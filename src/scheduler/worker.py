@@ -0,0 +1,195 @@
+import asyncio
+import logging
+
+from storage import redis_client, reminders
+from .digest import decode_runs
+from .fanout import PartialDelivery
+from .journal import RunInProgress, journal
+from .stream import DELIVERY_GROUP, DELIVERY_STREAM
+from .tasks import send_digest, send_reminder
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryWorker:
+    """
+    Consumes due reminders from the delivery stream.
+
+    All replicas read through one consumer group, so every entry is handed to
+    exactly one worker. Entries of a worker that died mid-batch stay pending
+    and are taken over by ``XAUTOCLAIM`` after ``claim_idle`` seconds; a
+    worker that is stopped hands its pending entries back right away. While a
+    batch is being sent the worker resets the idle time of its entries and
+    renews the journal leases, so a send waiting out the rate limit is not
+    taken for a dead one.
+    """
+
+    def __init__(
+        self,
+        consumer: str,
+        batch_size: int = 100,
+        block: float = 5,
+        claim_idle: float = 300,
+    ):
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_ms = int(block * 1000)
+        self.claim_idle_ms = int(claim_idle * 1000)
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._busy = False
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="delivery-worker")
+
+    async def stop(self, timeout: float = 0):
+        """
+        Lets the current batch finish within ``timeout``, then re-publishes
+        whatever is still pending on this consumer so other replicas pick it
+        up without waiting for ``claim_idle``.
+        """
+        if self._task is None:
+            return
+
+        self._stopping = True
+        if not self._busy:
+            # ждёт в XREADGROUP — прерываем сразу
+            self._task.cancel()
+        done, _ = await asyncio.wait({self._task}, timeout=timeout)
+        if not done:
+            logger.warning("Delivery batch did not finish in %ss, interrupting", timeout)
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        await self.release()
+
+    async def release(self) -> int:
+        """Moves entries pending on this consumer to the end of the stream."""
+        released = 0
+        while ids := await redis_client.xpending_ids(
+            DELIVERY_STREAM, DELIVERY_GROUP, self.consumer, self.batch_size
+        ):
+            entries = await redis_client.xclaim(DELIVERY_STREAM, DELIVERY_GROUP, self.consumer, 0, ids)
+            # удалённые из стрима записи XCLAIM не вернёт — их просто снимаем с учёта
+            found = dict(entries)
+            await redis_client.xrequeue(
+                DELIVERY_STREAM, DELIVERY_GROUP, [(entry_id, found.get(entry_id)) for entry_id in ids]
+            )
+            released += len(found)
+
+        if released:
+            logger.info("Handed %d unfinished deliveries back to the stream", released)
+        await redis_client.xgroup_delconsumer(DELIVERY_STREAM, DELIVERY_GROUP, self.consumer)
+        return released
+
+    async def setup(self):
+        await redis_client.xgroup_create(DELIVERY_STREAM, DELIVERY_GROUP, id="0")
+
+    async def run_once(self, block: bool = True) -> int:
+        """Delivers one batch and returns the number of stream entries handled."""
+        handled = await self._reclaim()
+        response = await redis_client.xreadgroup(
+            DELIVERY_GROUP,
+            self.consumer,
+            {DELIVERY_STREAM: ">"},
+            count=self.batch_size,
+            block=self.block_ms if block else None,
+        )
+        for _, entries in response or []:
+            await self._process(entries)
+            handled += len(entries)
+        return handled
+
+    async def _run(self):
+        await self.setup()
+
+        while not self._stopping:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Delivery worker iteration failed")
+                await asyncio.sleep(1)
+
+    async def _reclaim(self) -> int:
+        # забираем то, что зависло у упавших воркеров
+        _, entries, _ = await redis_client.xautoclaim(
+            DELIVERY_STREAM,
+            DELIVERY_GROUP,
+            self.consumer,
+            self.claim_idle_ms,
+            count=self.batch_size,
+        )
+        if entries:
+            logger.warning("Reclaimed %d stale deliveries", len(entries))
+            await self._process(entries)
+        return len(entries)
+
+    async def _process(self, entries: list):
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if not entries:
+            return
+
+        self._busy = True
+        heartbeat = asyncio.create_task(self._heartbeat([entry_id for entry_id, _ in entries]))
+        try:
+            await self._deliver(entries)
+        finally:
+            heartbeat.cancel()
+            self._busy = False
+
+    async def _heartbeat(self, entry_ids: list[str]):
+        # отправка может долго ждать в очереди — не даём XAUTOCLAIM и lease её «похоронить»
+        while True:
+            await asyncio.sleep(self.claim_idle_ms / 3000)
+            try:
+                await redis_client.xclaim(
+                    DELIVERY_STREAM, DELIVERY_GROUP, self.consumer, 0, entry_ids, justid=True
+                )
+                await journal.renew()
+            except Exception:
+                logger.warning("Failed to renew in-flight deliveries", exc_info=True)
+
+    async def _deliver(self, entries: list):
+        # запись-дайджест несёт несколько запусков одного пользователя
+        digests = {
+            entry_id: decode_runs(fields["digest"])
+            for entry_id, fields in entries if "digest" in fields
+        }
+        reminder_ids = list({
+            *(fields["reminder_id"] for _, fields in entries if "digest" not in fields),
+            *(reminder_id for runs in digests.values() for reminder_id, _ in runs),
+        })
+        records = dict(zip(reminder_ids, await reminders.get_many(reminder_ids)))
+
+        sends = []
+        for entry_id, fields in entries:
+            if entry_id in digests:
+                runs = [(rid, records[rid], run_at) for rid, run_at in digests[entry_id]]
+                sends.append((entry_id, send_digest(runs)))
+            elif records[fields["reminder_id"]]:
+                sends.append((entry_id, send_reminder(
+                    fields["reminder_id"],
+                    records[fields["reminder_id"]],
+                    missed=int(fields.get("missed", 0)),
+                    scheduled_at=float(fields["run_at"]),
+                    attempt=int(fields.get("attempt", 0)),
+                )))
+        results = await asyncio.gather(*(send for _, send in sends), return_exceptions=True)
+
+        resume = set()
+        for (entry_id, _), result in zip(sends, results):
+            if isinstance(result, (PartialDelivery, RunInProgress)):
+                # запись остаётся в pending — XAUTOCLAIM вернёт её и рассылка продолжится
+                logger.warning("%s", result)
+                resume.add(entry_id)
+            elif isinstance(result, Exception):
+                logger.error("Failed to send reminder", exc_info=result)
+
+        acked = [entry_id for entry_id, _ in entries if entry_id not in resume]
+        if acked:
+            await redis_client.xack_and_delete(DELIVERY_STREAM, DELIVERY_GROUP, *acked)
@@ -1,5 +1,8 @@
 from config import settings
+from .cache import RecordCache
 from .client import AsyncRedisOverride
+from .repository import ReminderRepository
+from .timezones import TimezoneResolver
 
 
 redis_client = AsyncRedisOverride(
@@ -8,3 +11,18 @@ redis_client = AsyncRedisOverride(
     password=settings.redis_password,
     db=settings.redis_db,
 )
+
+reminder_cache = RecordCache(
+    redis_client,
+    channel="reminders:invalidate",
+    maxsize=settings.reminder_cache_size,
+    ttl=settings.reminder_cache_ttl,
+)
+
+reminders = ReminderRepository(
+    redis_client,
+    encoding=settings.reminder_encoding,
+    cache=reminder_cache,
+)
+
+timezones = TimezoneResolver(redis_client, default=settings.default_timezone)
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from metrics.base import cache_requests
+from .client import AsyncRedisOverride
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecordCache:
+    """
+    In-process read-through cache of decoded records, TTL plus LRU eviction.
+
+    Writers call ``invalidate``: the entry is dropped locally and its id is
+    published on ``channel`` so other processes drop it too. If the
+    subscription breaks, the whole cache is cleared on reconnect because
+    invalidations may have been lost; the TTL bounds staleness meanwhile.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        channel: str,
+        maxsize: int = 10_000,
+        ttl: float = 60,
+    ):
+        self.client = client
+        self.channel = channel
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._generation = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def generation(self) -> int:
+        """Changes on every invalidation; read it before fetching from Redis."""
+        return self._generation
+
+    def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            cache_requests.labels("miss").inc()
+            return None
+
+        self._entries.move_to_end(key)
+        cache_requests.labels("hit").inc()
+        return dict(entry[0])
+
+    def put(self, key: str, value: dict, generation: int):
+        # пока читали из Redis, запись могли поменять — не кешируем устаревшее
+        if not self.maxsize or not value or generation != self._generation:
+            return
+
+        self._entries[key] = (dict(value), time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, *keys: str):
+        self._generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    async def invalidate(self, *keys: str):
+        if not keys:
+            return
+        self.discard(*keys)
+        await self.client.publish(self.channel, " ".join(keys))
+
+    def start(self):
+        self._task = asyncio.create_task(self._listen(), name="cache-invalidation")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.discard(*message["data"].split())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation channel failed, reconnecting")
+                self.clear()
+                await asyncio.sleep(1)
@@ -1,8 +1,33 @@
 import json
+import time
+from functools import wraps
 
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
+from redis.client import NEVER_DECODE
+from redis.exceptions import ResponseError
 from redis.typing import KeyT, FieldT
 
+from metrics.base import redis_latency
+
+
+def timed(func, command: str | None = None):
+    command = command or func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            redis_latency.labels(command).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def _decoding(raw: bool) -> dict:
+    # redis-py смотрит только на наличие опции, не на значение
+    return {NEVER_DECODE: True} if raw else {}
+
 
 class AsyncRedisOverride:
     def __init__(
@@ -20,9 +45,58 @@ class AsyncRedisOverride:
             db=db
         )
 
+    @property
+    def connection_pool(self) -> ConnectionPool:
+        return self.__redis.connection_pool
+
+    def pipeline(self, transaction: bool = True):
+        return self.__redis.pipeline(transaction=transaction)
+
+    def pubsub(self):
+        return self.__redis.pubsub()
+
+    async def aclose(self):
+        await self.__redis.aclose()
+
+    def register_script(self, script: str):
+        return timed(self.__redis.register_script(script).__call__, "evalsha")
+
+    @timed
+    async def info(self, section: str | None = None) -> dict:
+        return await self.__redis.info(section)
+
+    @timed
+    async def dbsize(self) -> int:
+        return await self.__redis.dbsize()
+
+    @timed
+    async def flushdb(self):
+        return await self.__redis.flushdb()
+
+    @timed
+    async def publish(self, channel: str, message: str) -> int:
+        return await self.__redis.publish(channel, message)
+
+    @timed
+    async def set(
+        self,
+        name: KeyT,
+        value: str,
+        ex: int | None = None,
+        px: int | None = None,
+        nx: bool = False
+    ):
+        return await self.__redis.set(name, value, ex=ex, px=px, nx=nx)
+
+    @timed
+    async def get(self, name: KeyT):
+        return await self.__redis.get(name)
+
+    @timed
     async def delete(self, *names: bytes | str | memoryview):
         await self.__redis.delete(*names)
 
+    @timed
     async def hset(
         self,
         name: str,
@@ -35,14 +109,175 @@ class AsyncRedisOverride:
             value = json.dumps(value)
         return await self.__redis.hset(name, key, value, mapping, items)
 
-    async def hgetall(self, name: str):
-        return await self.__redis.hgetall(name)
+    @timed
+    async def hget(self, name: str, key: str, raw: bool = False):
+        # raw=True — байты без декодирования (msgpack и т.п.)
+        return await self.__redis.execute_command("HGET", name, key, **_decoding(raw))
+
+    @timed
+    async def hgetall(self, name: str, raw: bool = False):
+        return await self.__redis.execute_command("HGETALL", name, **_decoding(raw))
 
+    @timed
+    async def hgetall_many(self, names: list[str], raw: bool = False) -> list[dict]:
+        if not names:
+            return []
+        async with self.__redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.execute_command("HGETALL", name, **_decoding(raw))
+            return await pipe.execute()
+
+    @timed
+    async def scan(self, cursor: int = 0, match: str | None = None, count: int | None = None):
+        return await self.__redis.scan(cursor, match=match, count=count)
+
+    @timed
+    async def memory_usage(self, key: KeyT) -> int | None:
+        return await self.__redis.memory_usage(key)
+
+    @timed
     async def sadd(self, name: KeyT, *values: FieldT):
         return await self.__redis.sadd(name, *values)
 
+    @timed
     async def smembers(self, name: KeyT):
         return await self.__redis.smembers(name)
 
+    @timed
+    async def scard(self, name: KeyT) -> int:
+        return await self.__redis.scard(name)
+
+    @timed
+    async def sscan(self, name: KeyT, cursor: int = 0, count: int | None = None):
+        return await self.__redis.sscan(name, cursor, count=count)
+
+    @timed
     async def srem(self, name: KeyT, *values: FieldT):
         return await self.__redis.srem(name, *values)
+
+    @timed
+    async def zadd(self, name: KeyT, mapping: dict, nx: bool = False, xx: bool = False):
+        return await self.__redis.zadd(name, mapping, nx=nx, xx=xx)
+
+    @timed
+    async def zrem(self, name: KeyT, *values: FieldT):
+        return await self.__redis.zrem(name, *values)
+
+    @timed
+    async def zmscore(self, name: KeyT, members: list[str]) -> list[float | None]:
+        if not members:
+            return []
+        return await self.__redis.zmscore(name, members)
+
+    @timed
+    async def zcard(self, name: KeyT) -> int:
+        return await self.__redis.zcard(name)
+
+    @timed
+    async def zscan(self, name: KeyT, cursor: int = 0, match: str | None = None, count: int | None = None):
+        return await self.__redis.zscan(name, cursor, match=match, count=count)
+
+    @timed
+    async def zrange(self, name: KeyT, start: int, end: int, withscores: bool = False):
+        return await self.__redis.zrange(name, start, end, withscores=withscores)
+
+    @timed
+    async def zrangebyscore(
+        self,
+        name: KeyT,
+        min: float | str,
+        max: float | str,
+        start: int | None = None,
+        num: int | None = None,
+        withscores: bool = False
+    ):
+        return await self.__redis.zrangebyscore(
+            name, min, max, start=start, num=num, withscores=withscores
+        )
+
+    @timed
+    async def xlen(self, name: KeyT) -> int:
+        return await self.__redis.xlen(name)
+
+    @timed
+    async def xadd_many(self, name: KeyT, entries: list[dict]):
+        async with self.__redis.pipeline(transaction=False) as pipe:
+            for fields in entries:
+                pipe.xadd(name, fields)
+            return await pipe.execute()
+
+    @timed
+    async def xgroup_create(self, name: KeyT, group: str, id: str = "$"):
+        try:
+            await self.__redis.xgroup_create(name, group, id=id, mkstream=True)
+        except ResponseError as e:
+            # группа уже создана другим процессом
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # не через @timed: BLOCK-ожидание пустого стрима испортило бы гистограмму
+    async def xreadgroup(
+        self,
+        group: str,
+        consumer: str,
+        streams: dict,
+        count: int | None = None,
+        block: int | None = None
+    ):
+        return await self.__redis.xreadgroup(group, consumer, streams, count=count, block=block)
+
+    @timed
+    async def xautoclaim(
+        self,
+        name: KeyT,
+        group: str,
+        consumer: str,
+        min_idle_time: int,
+        start_id: str = "0-0",
+        count: int | None = None
+    ):
+        return await self.__redis.xautoclaim(
+            name, group, consumer, min_idle_time, start_id=start_id, count=count
+        )
+
+    @timed
+    async def xpending_ids(self, name: KeyT, group: str, consumer: str, count: int) -> list[str]:
+        pending = await self.__redis.xpending_range(
+            name, group, min="-", max="+", count=count, consumername=consumer
+        )
+        return [entry["message_id"] for entry in pending]
+
+    @timed
+    async def xclaim(
+        self,
+        name: KeyT,
+        group: str,
+        consumer: str,
+        min_idle_time: int,
+        ids: list[str],
+        justid: bool = False,
+    ):
+        return await self.__redis.xclaim(name, group, consumer, min_idle_time, ids, justid=justid)
+
+    @timed
+    async def xgroup_delconsumer(self, name: KeyT, group: str, consumer: str) -> int:
+        return await self.__redis.xgroup_delconsumer(name, group, consumer)
+
+    @timed
+    async def xrequeue(self, name: KeyT, group: str, entries: list):
+        # копия в конец стрима и ack оригинала — одной транзакцией
+        async with self.__redis.pipeline(transaction=True) as pipe:
+            for _, fields in entries:
+                if fields:
+                    pipe.xadd(name, fields)
+            ids = [entry_id for entry_id, _ in entries]
+            pipe.xack(name, group, *ids)
+            pipe.xdel(name, *ids)
+            await pipe.execute()
+
+    @timed
+    async def xack_and_delete(self, name: KeyT, group: str, *ids: str):
+        async with self.__redis.pipeline(transaction=True) as pipe:
+            pipe.xack(name, group, *ids)
+            pipe.xdel(name, *ids)
+            await pipe.execute()
@@ -0,0 +1,141 @@
+import secrets
+import string
+import uuid
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import msgpack
+
+
+BASE62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+
+# коды — индексы в кортежах, новые значения только дописывать в конец
+REPEAT_TYPES = ("once", "daily", "weekly", "monthly", "yearly")
+STATUSES = ("active", "inactive", "done")
+
+
+def base62(number: int) -> str:
+    chars = []
+    while True:
+        number, rest = divmod(number, 62)
+        chars.append(BASE62[rest])
+        if not number:
+            return "".join(reversed(chars))
+
+
+def is_legacy_id(reminder_id: str) -> bool:
+    # uuid4 из первой версии: 36 символов с дефисами
+    return len(reminder_id) == 36 and reminder_id.count("-") == 4
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _enum_code(value: str, table: tuple[str, ...]) -> int | str:
+    # неизвестное значение пишем как есть — прочитается без таблицы
+    return table.index(value) if value in table else value
+
+
+def _enum_value(code: int | str, table: tuple[str, ...]) -> str:
+    return table[code] if isinstance(code, int) else code
+
+
+class HashCodec:
+    """``reminder:<uuid>`` hash with one string field per attribute."""
+
+    prefix = "reminder:"
+    user_field = "user_id"
+    missed_fields = ("missed_runs", "last_missed_at")
+    recipients_field = "recipients"
+
+    def new_id(self) -> str:
+        return str(uuid.uuid4())
+
+    def key(self, reminder_id: str) -> str:
+        return f"{self.prefix}{reminder_id}"
+
+    def encode(self, data: dict) -> dict:
+        return data
+
+    def decode(self, raw: dict) -> dict:
+        return {_text(field): _text(value) for field, value in raw.items()}
+
+
+class PackedCodec:
+    """
+    ``r:<base62>`` hash: ``u`` user id, ``d`` msgpack of the rest.
+
+    ``type`` and ``status`` are stored as enum codes and ``run_at`` as epoch
+    seconds plus the zone name. The user id and the missed-run counters stay
+    separate fields so the Lua scripts can read and increment them, as does
+    the recipient count of fan-out reminders.
+    """
+
+    prefix = "r:"
+    user_field = "u"
+    missed_fields = ("m", "t")
+    recipients_field = "n"
+
+    def new_id(self) -> str:
+        return base62(secrets.randbits(64))
+
+    def key(self, reminder_id: str) -> str:
+        return f"{self.prefix}{reminder_id}"
+
+    def pack(self, data: dict) -> bytes:
+        run_at = datetime.fromisoformat(data["run_at"])
+        tz = data.get("tz") or getattr(run_at.tzinfo, "key", None)
+        if run_at.tzinfo is None and tz:
+            run_at = run_at.replace(tzinfo=ZoneInfo(tz))
+        timestamp = run_at.timestamp()
+        return msgpack.packb([
+            data["text"],
+            int(timestamp) if timestamp.is_integer() else timestamp,
+            tz,
+            _enum_code(data["type"], REPEAT_TYPES),
+            _enum_code(data["status"], STATUSES),
+        ])
+
+    def unpack(self, blob: bytes) -> dict:
+        text, timestamp, tz, repeat_type, status = msgpack.unpackb(blob)
+        data = {
+            "text": text,
+            "type": _enum_value(repeat_type, REPEAT_TYPES),
+            "status": _enum_value(status, STATUSES),
+        }
+        if tz:
+            data["tz"] = tz
+        data["run_at"] = datetime.fromtimestamp(
+            timestamp, ZoneInfo(tz) if tz else None
+        ).isoformat()
+        return data
+
+    def _plain_fields(self):
+        yield from zip(HashCodec.missed_fields, self.missed_fields)
+        yield HashCodec.recipients_field, self.recipients_field
+
+    def encode(self, data: dict) -> dict:
+        mapping = {"u": data["user_id"], "d": self.pack(data)}
+        for name, field in self._plain_fields():
+            if name in data:
+                mapping[field] = data[name]
+        return mapping
+
+    def decode(self, raw: dict) -> dict:
+        raw = {_text(field): value for field, value in raw.items()}
+        if "d" not in raw:
+            return {}
+
+        data = {"user_id": _text(raw["u"]), **self.unpack(raw["d"])}
+        for name, field in self._plain_fields():
+            if field in raw:
+                data[name] = _text(raw[field])
+        return data
+
+
+CODECS = {"hash": HashCodec(), "packed": PackedCodec()}
+
+
+def codec_for(reminder_id: str) -> HashCodec | PackedCodec:
+    return CODECS["hash"] if is_legacy_id(reminder_id) else CODECS["packed"]
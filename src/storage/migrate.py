@@ -0,0 +1,207 @@
+"""
+Converts ``reminder:<uuid>`` hashes to the packed layout and reports memory.
+
+    python -m storage.migrate --report   # only compare the two layouts
+    python -m storage.migrate            # migrate, then compare
+
+Stop the scheduler and delivery roles and let the delivery stream drain
+first: entries already published still carry the old ids.
+"""
+import argparse
+import asyncio
+import json
+
+from config import settings
+from . import redis_client
+from .codec import CODECS, is_legacy_id
+from .repository import SCHEDULE_KEY, recipients_key, user_reminders_key
+
+
+# KEYS: old hash, new hash, user set, schedule, old recipients, new recipients
+# ARGV: old id, new id, число ожидаемых полей N, N пар field/value прочитанной записи,
+#       затем field/value новой записи
+MIGRATE_SCRIPT = """
+local current = redis.call("HGETALL", KEYS[1])
+if #current == 0 then
+    return 0
+end
+-- запись сверяем целиком: updates-роль могла перенести её или сменить получателей
+local expected = tonumber(ARGV[3])
+if #current ~= 2 * expected then
+    return -1
+end
+local values = {}
+for i = 1, #current, 2 do
+    values[current[i]] = current[i + 1]
+end
+for i = 4, 3 + 2 * expected, 2 do
+    if values[ARGV[i]] ~= ARGV[i + 1] then
+        return -1
+    end
+end
+redis.call("HSET", KEYS[2], unpack(ARGV, 4 + 2 * expected))
+local score = redis.call("ZSCORE", KEYS[4], ARGV[1])
+if score then
+    redis.call("ZREM", KEYS[4], ARGV[1])
+    redis.call("ZADD", KEYS[4], score, ARGV[2])
+end
+if redis.call("EXISTS", KEYS[5]) == 1 then
+    redis.call("RENAME", KEYS[5], KEYS[6])
+end
+redis.call("SREM", KEYS[3], ARGV[1])
+redis.call("SADD", KEYS[3], ARGV[2])
+redis.call("DEL", KEYS[1])
+return 1
+"""
+
+legacy, packed = CODECS["hash"], CODECS["packed"]
+# временные ключи отчёта — вне пространства ключей напоминаний
+PROBE_PREFIX = "migrate:probe:"
+
+
+async def legacy_batches(batch_size: int):
+    cursor = 0
+    while True:
+        cursor, keys = await redis_client.scan(cursor, match=f"{legacy.prefix}*", count=batch_size)
+        reminder_ids = [
+            key.removeprefix(legacy.prefix)
+            for key in keys
+            if is_legacy_id(key.removeprefix(legacy.prefix))
+        ]
+        if reminder_ids:
+            records = await redis_client.hgetall_many([legacy.key(rid) for rid in reminder_ids])
+            yield [(rid, data) for rid, data in zip(reminder_ids, records) if data]
+        if not cursor:
+            return
+
+
+def with_timezone(data: dict) -> dict:
+    # записи до персональных поясов жили в поясе планировщика
+    return {"tz": settings.default_timezone, **data}
+
+
+async def used_memory() -> int | None:
+    try:
+        return (await redis_client.info("memory")).get("used_memory")
+    except Exception:
+        return None
+
+
+async def key_size(key: str, fields: dict) -> int:
+    try:
+        size = await redis_client.memory_usage(key)
+    except Exception:
+        size = None
+    if size is not None:
+        return size
+    # MEMORY USAGE недоступен (fakeredis) — считаем полезную нагрузку
+    return len(key) + sum(len(str(field)) + len(value if isinstance(value, bytes) else str(value))
+                          for field, value in fields.items())
+
+
+async def report(sample: int, batch_size: int) -> dict:
+    """
+    Measures a sample of legacy records against their packed form.
+
+    Each packed form is written for a moment under ``migrate:probe:<id>``,
+    never as a reminder key, and removed right after.
+    """
+    legacy_bytes = packed_bytes = measured = 0
+    async for batch in legacy_batches(batch_size):
+        for reminder_id, data in batch:
+            new_id = packed.new_id()
+            mapping = packed.encode(with_timezone(data))
+            # меряем под служебным ключом: r:<id> увидели бы реконсилер и воркеры
+            probe = f"{PROBE_PREFIX}{new_id}"
+            try:
+                await redis_client.hset(probe, mapping=mapping)
+                size = await key_size(probe, mapping) - len(probe) + len(packed.key(new_id))
+            finally:
+                await redis_client.delete(probe)
+            # id ещё дважды лежит в множестве пользователя и в расписании
+            legacy_bytes += await key_size(legacy.key(reminder_id), data) + 2 * len(reminder_id)
+            packed_bytes += size + 2 * len(new_id)
+            measured += 1
+            if measured >= sample:
+                break
+        if measured >= sample:
+            break
+
+    if not measured:
+        return {"sampled": 0}
+
+    return {
+        "sampled": measured,
+        "legacy_bytes_per_reminder": round(legacy_bytes / measured, 1),
+        "packed_bytes_per_reminder": round(packed_bytes / measured, 1),
+        "saved_percent": round(100 * (1 - packed_bytes / legacy_bytes), 1),
+    }
+
+
+async def migrate(batch_size: int, dry_run: bool) -> dict:
+    script = redis_client.register_script(MIGRATE_SCRIPT)
+    migrated = changed = 0
+
+    async for batch in legacy_batches(batch_size):
+        for reminder_id, data in batch:
+            if dry_run:
+                migrated += 1
+                continue
+
+            new_id = packed.new_id()
+            args = [reminder_id, new_id, len(data)]
+            for field, value in data.items():
+                args += [field, value]
+            for field, value in packed.encode(with_timezone(data)).items():
+                args += [field, value]
+
+            result = await script(
+                keys=[
+                    legacy.key(reminder_id),
+                    packed.key(new_id),
+                    user_reminders_key(data["user_id"]),
+                    SCHEDULE_KEY,
+                    recipients_key(reminder_id),
+                    recipients_key(new_id),
+                ],
+                args=args,
+            )
+            if result == 1:
+                migrated += 1
+            elif result == -1:
+                # запись поменялась между чтением и скриптом — подберём при повторном запуске
+                changed += 1
+
+    return {"migrated": migrated, "changed_during_migration": changed, "dry_run": dry_run}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m storage.migrate",
+        description="Move reminders to the packed msgpack layout",
+    )
+    parser.add_argument("--report", action="store_true", help="only print the memory comparison")
+    parser.add_argument("--dry-run", action="store_true", help="count records without writing")
+    parser.add_argument("--sample", type=int, default=1000, help="records measured for the report")
+    parser.add_argument("--batch", type=int, default=500, help="SCAN count per round trip")
+    return parser.parse_args()
+
+
+async def main(args):
+    used_before = await used_memory()
+    result = {"report": await report(args.sample, args.batch)}
+
+    if not args.report:
+        result["migration"] = await migrate(args.batch, args.dry_run)
+        used_after = await used_memory()
+        if used_before and used_after:
+            result["used_memory_mb"] = {
+                "before": round(used_before / 2 ** 20, 1),
+                "after": round(used_after / 2 ** 20, 1),
+            }
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,399 @@
+from .cache import RecordCache
+from .client import AsyncRedisOverride
+from .codec import CODECS, codec_for
+
+
+SCHEDULE_KEY = "reminders:schedule"
+
+
+def reminder_key(reminder_id: str) -> str:
+    return codec_for(reminder_id).key(reminder_id)
+
+
+def user_reminders_key(user_id: int | str) -> str:
+    return f"user:{user_id}:reminders"
+
+
+def recipients_key(reminder_id: str) -> str:
+    return f"recipients:{reminder_id}"
+
+
+# KEYS: reminder, user set, schedule, recipients
+# ARGV: reminder_id, score, limit (0 — без лимита), recipient count, recipients..., field, value, ...
+CREATE_SCRIPT = """
+local limit = tonumber(ARGV[3])
+if limit > 0 and redis.call("SCARD", KEYS[2]) >= limit then
+    return 0
+end
+local count = tonumber(ARGV[4])
+if count > 0 then
+    redis.call("SADD", KEYS[4], unpack(ARGV, 5, 4 + count))
+end
+redis.call("HSET", KEYS[1], unpack(ARGV, 5 + count))
+redis.call("SADD", KEYS[2], ARGV[1])
+redis.call("ZADD", KEYS[3], ARGV[2], ARGV[1])
+return 1
+"""
+
+# KEYS: reminder, schedule, recipients; ARGV: reminder_id, user field
+DELETE_SCRIPT = """
+local user_id = redis.call("HGET", KEYS[1], ARGV[2])
+if not user_id then
+    return false
+end
+redis.call("DEL", KEYS[1], KEYS[3])
+redis.call("SREM", "user:" .. user_id .. ":reminders", ARGV[1])
+redis.call("ZREM", KEYS[2], ARGV[1])
+return user_id
+"""
+
+# KEYS: reminder, schedule, recipients; ARGV: reminder_id, user field, guard field, expected value
+RETIRE_SCRIPT = """
+-- запись перенесли на новое время, пока отправлялся старый запуск, — не трогаем
+if redis.call("ZSCORE", KEYS[2], ARGV[1]) or redis.call("HGET", KEYS[1], ARGV[3]) ~= ARGV[4] then
+    return false
+end
+local user_id = redis.call("HGET", KEYS[1], ARGV[2])
+redis.call("DEL", KEYS[1], KEYS[3])
+redis.call("SREM", "user:" .. user_id .. ":reminders", ARGV[1])
+return user_id
+"""
+
+# KEYS: schedule; ARGV: reminder_id, expected score, next score ("" — снять), ...
+CLAIM_SCRIPT = """
+local claimed = {}
+for i = 1, #ARGV, 3 do
+    local score = redis.call("ZSCORE", KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[i + 1]) then
+        if ARGV[i + 2] == "" then
+            redis.call("ZREM", KEYS[1], ARGV[i])
+        else
+            redis.call("ZADD", KEYS[1], ARGV[i + 2], ARGV[i])
+        end
+        claimed[#claimed + 1] = ARGV[i]
+    end
+end
+return claimed
+"""
+
+# KEYS: reminders; ARGV: now, затем на каждый ключ: skipped runs, count field, time field
+RECORD_MISSED_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local j = 3 * i - 1
+    if redis.call("EXISTS", key) == 1 then
+        redis.call("HINCRBY", key, ARGV[j + 1], ARGV[j])
+        redis.call("HSET", key, ARGV[j + 2], ARGV[1])
+    end
+end
+return 1
+"""
+
+# KEYS: reminder; ARGV: field, value, ...
+UPDATE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("HSET", KEYS[1], unpack(ARGV))
+return 1
+"""
+
+# KEYS: reminder, schedule
+# ARGV: reminder_id, score, guard field ("" — без проверки), expected value, field, value, ...
+RESCHEDULE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[3] ~= "" and redis.call("HGET", KEYS[1], ARGV[3]) ~= ARGV[4] then
+    return -1
+end
+redis.call("HSET", KEYS[1], unpack(ARGV, 5))
+redis.call("ZADD", KEYS[2], ARGV[2], ARGV[1])
+return 1
+"""
+
+# KEYS: reminder, recipients; ARGV: count field, recipients...
+SET_RECIPIENTS_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("DEL", KEYS[2])
+if #ARGV > 1 then
+    redis.call("SADD", KEYS[2], unpack(ARGV, 2))
+    redis.call("HSET", KEYS[1], ARGV[1], redis.call("SCARD", KEYS[2]))
+else
+    redis.call("HDEL", KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+# KEYS: reminder; ARGV: field, expected value, new value
+SWAP_SCRIPT = """
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+if not current then
+    return 0
+end
+if current ~= ARGV[2] then
+    return -1
+end
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[3])
+return 1
+"""
+
+
+class ReminderRepository:
+    """
+    Reminder lifecycle on top of ``AsyncRedisOverride``.
+
+    Every operation touching the hash, the per-user index and the schedule
+    runs as one Lua script: one round trip and no orphans if the process dies
+    half way.
+
+    New reminders are written with the ``encoding`` codec; existing ones are
+    read with the codec matching their id, so both layouts live side by side
+    until ``python -m storage.migrate`` converts the old records.
+
+    Reads go through ``cache`` when one is given; every write invalidates
+    the touched records.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        schedule_key: str = SCHEDULE_KEY,
+        encoding: str = "hash",
+        cache: RecordCache | None = None,
+    ):
+        self.client = client
+        self.schedule_key = schedule_key
+        self.codec = CODECS[encoding]
+        self.cache = cache
+
+        self._create = client.register_script(CREATE_SCRIPT)
+        self._delete = client.register_script(DELETE_SCRIPT)
+        self._retire = client.register_script(RETIRE_SCRIPT)
+        self._update = client.register_script(UPDATE_SCRIPT)
+        self._swap = client.register_script(SWAP_SCRIPT)
+        self._reschedule = client.register_script(RESCHEDULE_SCRIPT)
+        self._set_recipients = client.register_script(SET_RECIPIENTS_SCRIPT)
+        self._claim = client.register_script(CLAIM_SCRIPT)
+        self._record_missed = client.register_script(RECORD_MISSED_SCRIPT)
+
+    async def get(self, reminder_id: str) -> dict:
+        return (await self.get_many([reminder_id]))[0]
+
+    async def get_many(self, reminder_ids: list[str]) -> list[dict]:
+        if self.cache is None:
+            return await self._read(reminder_ids)
+
+        found = {rid: self.cache.get(rid) for rid in reminder_ids}
+        missing = [rid for rid, data in found.items() if data is None]
+        if missing:
+            generation = self.cache.generation
+            for rid, data in zip(missing, await self._read(missing)):
+                found[rid] = data
+                self.cache.put(rid, data, generation)
+        return [found[rid] for rid in reminder_ids]
+
+    async def _read(self, reminder_ids: list[str]) -> list[dict]:
+        records = await self.client.hgetall_many(
+            [reminder_key(rid) for rid in reminder_ids], raw=True
+        )
+        return [codec_for(rid).decode(raw) for rid, raw in zip(reminder_ids, records)]
+
+    async def _invalidate(self, *reminder_ids: str):
+        if self.cache is not None:
+            await self.cache.invalidate(*reminder_ids)
+
+    async def user_reminder_ids(self, user_id: int) -> list[str]:
+        return list(await self.client.smembers(user_reminders_key(user_id)))
+
+    async def next_runs(self, reminder_ids: list[str]) -> list[float | None]:
+        return await self.client.zmscore(self.schedule_key, reminder_ids)
+
+    async def recipients(self, reminder_id: str) -> list[int]:
+        return sorted(int(chat_id) for chat_id in await self.client.smembers(recipients_key(reminder_id)))
+
+    async def count(self, user_id: int) -> int:
+        return await self.client.scard(user_reminders_key(user_id))
+
+    async def create(
+        self,
+        data: dict,
+        next_run: float,
+        recipients: list[int] | None = None,
+        limit: int = 0,
+    ) -> str | None:
+        """
+        ``recipients`` makes a fan-out reminder: it is stored once and sent to
+        every listed chat instead of the owner's.
+
+        Returns ``None`` without writing anything if the owner already has
+        ``limit`` reminders.
+        """
+        reminder_id, keys, args = self._create_call(data, next_run, recipients, limit)
+        created = await self._create(keys=keys, args=args)
+        return reminder_id if created else None
+
+    async def create_many(self, items: list[tuple[dict, float, list[int]]], limit: int = 0) -> list[str]:
+        """
+        Writes many reminders in one MULTI/EXEC pipeline, one round trip.
+
+        Every reminder goes through the same script as ``create``, so ``limit``
+        holds for the batch too; returns the ids that were written.
+        """
+        calls = [self._create_call(data, next_run, recipients, limit) for data, next_run, recipients in items]
+        if not calls:
+            return []
+        async with self.client.pipeline(transaction=True) as pipe:
+            for _, keys, args in calls:
+                await self._create(keys=keys, args=args, client=pipe)
+            created = await pipe.execute()
+        return [reminder_id for (reminder_id, _, _), ok in zip(calls, created) if ok]
+
+    def _create_call(
+        self,
+        data: dict,
+        next_run: float,
+        recipients: list[int] | None,
+        limit: int,
+    ) -> tuple[str, list[str], list]:
+        recipients = sorted(set(recipients or []))
+        if recipients:
+            data = {**data, "recipients": len(recipients)}
+
+        reminder_id = self.codec.new_id()
+        args = [reminder_id, next_run, limit, len(recipients), *recipients]
+        for field, value in self.codec.encode(data).items():
+            args += [field, value]
+        keys = [
+            self.codec.key(reminder_id),
+            user_reminders_key(data["user_id"]),
+            self.schedule_key,
+            recipients_key(reminder_id),
+        ]
+        return reminder_id, keys, args
+
+    async def update(self, reminder_id: str, mapping: dict) -> bool:
+        codec = codec_for(reminder_id)
+        if codec is CODECS["hash"]:
+            args = []
+            for field, value in mapping.items():
+                args += [field, value]
+            updated = bool(await self._update(keys=[reminder_key(reminder_id)], args=args))
+            await self._invalidate(reminder_id)
+            return updated
+
+        # упакованная запись меняется целиком: read-modify-write с проверкой
+        key = codec.key(reminder_id)
+        while True:
+            blob = await self.client.hget(key, "d", raw=True)
+            if blob is None:
+                return False
+            packed = codec.pack({**codec.unpack(blob), **mapping})
+            swapped = await self._swap(keys=[key], args=["d", blob, packed])
+            if swapped != -1:
+                await self._invalidate(reminder_id)
+                return bool(swapped)
+
+    async def reschedule(self, reminder_id: str, mapping: dict, next_run: float) -> bool:
+        """
+        Updates the record and moves its schedule entry to ``next_run`` in one
+        script, so the reminder keeps its id and the dispatcher never sees the
+        new time with the old record or the other way round.
+        """
+        codec = codec_for(reminder_id)
+        key = codec.key(reminder_id)
+        while True:
+            if codec is CODECS["hash"]:
+                guard, fields = ["", ""], mapping
+            else:
+                # упакованная запись меняется целиком: проверяем, что её не переписали
+                blob = await self.client.hget(key, "d", raw=True)
+                if blob is None:
+                    return False
+                guard, fields = ["d", blob], {"d": codec.pack({**codec.unpack(blob), **mapping})}
+
+            args = [reminder_id, next_run, *guard]
+            for field, value in fields.items():
+                args += [field, value]
+            updated = await self._reschedule(keys=[key, self.schedule_key], args=args)
+            if updated != -1:
+                await self._invalidate(reminder_id)
+                return bool(updated)
+
+    async def set_user_status(self, user_id: int, status: str, current: str) -> int:
+        """Switches the user's reminders that are in ``current`` status to ``status``."""
+        reminder_ids = await self.user_reminder_ids(user_id)
+        records = await self.get_many(reminder_ids)
+
+        changed = 0
+        for reminder_id, data in zip(reminder_ids, records):
+            if data and data.get("status") == current:
+                changed += await self.update(reminder_id, {"status": status})
+        return changed
+
+    async def delete(self, reminder_id: str) -> int | None:
+        user_id = await self._delete(
+            keys=[reminder_key(reminder_id), self.schedule_key, recipients_key(reminder_id)],
+            args=[reminder_id, codec_for(reminder_id).user_field],
+        )
+        await self._invalidate(reminder_id)
+        return int(user_id) if user_id is not None else None
+
+    async def set_recipients(self, reminder_id: str, recipients: list[int]) -> bool:
+        """Replaces the recipient list; an empty list turns fan-out off."""
+        updated = await self._set_recipients(
+            keys=[reminder_key(reminder_id), recipients_key(reminder_id)],
+            args=[codec_for(reminder_id).recipients_field, *sorted(set(recipients))],
+        )
+        await self._invalidate(reminder_id)
+        return bool(updated)
+
+    async def retire(self, reminder_id: str, run_at: str) -> int | None:
+        """
+        Deletes a one-off reminder after its run, unless it was rescheduled
+        meanwhile: the record's ``run_at`` has to be the fired one and the
+        reminder must be off the schedule.
+        """
+        codec = codec_for(reminder_id)
+        key = codec.key(reminder_id)
+        if codec is CODECS["hash"]:
+            guard = ["run_at", run_at]
+        else:
+            blob = await self.client.hget(key, "d", raw=True)
+            if blob is None or codec.unpack(blob).get("run_at") != run_at:
+                return None
+            guard = ["d", blob]
+
+        user_id = await self._retire(
+            keys=[key, self.schedule_key, recipients_key(reminder_id)],
+            args=[reminder_id, codec.user_field, *guard],
+        )
+        await self._invalidate(reminder_id)
+        return int(user_id) if user_id is not None else None
+
+    async def claim_due(self, entries: list[tuple[str, float, float | None]]) -> list[str]:
+        """
+        Moves due reminders to their next run time (or off the schedule).
+
+        A reminder is claimed only if its score is still the one that was read,
+        so two dispatchers racing on the same bucket never fire it twice.
+        """
+        args = []
+        for reminder_id, score, next_run in entries:
+            args += [reminder_id, repr(score), "" if next_run is None else repr(next_run)]
+
+        return await self._claim(keys=[self.schedule_key], args=args)
+
+    async def record_missed(self, missed: dict[str, int], now: float):
+        if not missed:
+            return
+
+        args = [now]
+        for reminder_id, runs in missed.items():
+            args += [runs, *codec_for(reminder_id).missed_fields]
+        await self._record_missed(
+            keys=[reminder_key(reminder_id) for reminder_id in missed],
+            args=args,
+        )
+        await self._invalidate(*missed)
@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from .client import AsyncRedisOverride
+
+
+def user_settings_key(user_id: int) -> str:
+    return f"user:{user_id}:settings"
+
+
+def parse_timezone(name: str) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(name.strip())
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+class TimezoneResolver:
+    """
+    Per-user timezone stored in ``user:<id>:settings`` behind an in-process LRU.
+
+    Entries expire after ``ttl`` seconds so a change made through another
+    replica is picked up without a pub/sub channel.
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisOverride,
+        default: str,
+        maxsize: int = 10_000,
+        ttl: float = 300,
+    ):
+        self.client = client
+        self.default = ZoneInfo(default)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: OrderedDict[int, tuple[ZoneInfo, float]] = OrderedDict()
+
+    async def get(self, user_id: int) -> ZoneInfo:
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            self._cache.move_to_end(user_id)
+            return cached[0]
+
+        name = await self.client.hget(user_settings_key(user_id), "tz")
+        tz = (name and parse_timezone(name)) or self.default
+        self._remember(user_id, tz)
+        return tz
+
+    async def set(self, user_id: int, tz: ZoneInfo):
+        await self.client.hset(user_settings_key(user_id), "tz", tz.key)
+        self._remember(user_id, tz)
+
+    def _remember(self, user_id: int, tz: ZoneInfo):
+        self._cache[user_id] = (tz, time.monotonic() + self.ttl)
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
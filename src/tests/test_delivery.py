@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from scheduler import delivery
+from scheduler.delivery import DeliveryQueue, TokenBucket
+from storage import redis_client
+
+
+def test_bucket_gives_out_capacity_then_spaces_by_rate(run):
+    bucket = TokenBucket(redis_client, "test:rate", rate=10)
+
+    delays = [run(bucket.reserve()) for _ in range(12)]
+
+    assert delays[:10] == [0] * 10
+    assert delays[10] == pytest.approx(0.1, abs=0.02)
+    assert delays[11] == pytest.approx(0.2, abs=0.02)
+
+
+def test_processes_share_one_bucket(run):
+    # два процесса — два объекта на одном ключе
+    first = TokenBucket(redis_client, "test:rate", rate=5)
+    second = TokenBucket(redis_client, "test:rate", rate=5)
+
+    for _ in range(5):
+        run(first.reserve())
+
+    assert run(second.reserve()) == pytest.approx(0.2, abs=0.02)
+
+
+def test_chats_have_separate_buckets(run):
+    bucket = TokenBucket(redis_client, "test:rate:chat", rate=1)
+
+    assert run(bucket.reserve("test:rate:chat:1")) == 0
+    assert run(bucket.reserve("test:rate:chat:1")) > 0
+    assert run(bucket.reserve("test:rate:chat:2")) == 0
+
+
+def test_busy_chat_does_not_hold_up_other_chats(run, monkeypatch):
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append(chat_id)
+
+    monkeypatch.setattr(delivery.bot, "send_message", send_message)
+
+    async def scenario():
+        queue = DeliveryQueue(redis_client, global_rate=100, chat_rate=1, workers=2, max_size=100)
+        queue.start()
+        for _ in range(5):
+            await queue.submit(1, "x")
+        others = [await queue.submit(100 + i, "y") for i in range(5)]
+        try:
+            # чату 1 нужно ещё 4 секунды, остальные не должны их ждать
+            await asyncio.wait_for(asyncio.gather(*others), 1)
+            return queue.stats()["deferred"]
+        finally:
+            await queue.stop()
+
+    assert run(scenario()) == 4
+    assert sent.count(1) == 1
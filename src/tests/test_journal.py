@@ -0,0 +1,56 @@
+import redis.asyncio
+
+from scheduler.journal import CLAIMED, PENDING, SENT, DeliveryJournal, fire_key
+from storage import redis_client
+
+
+def pttl(run, reminder_id: str, run_at: float) -> int:
+    # у AsyncRedisOverride нет PTTL — спрашиваем через тот же пул
+    client = redis.asyncio.Redis(connection_pool=redis_client.connection_pool)
+    return run(client.pttl(fire_key(reminder_id, run_at)))
+
+
+def test_a_run_is_claimed_once(run):
+    journal = DeliveryJournal(redis_client)
+    # второй воркер получил ту же запись стрима
+    other = DeliveryJournal(redis_client)
+
+    assert run(journal.claim("r1", 100.0)) == CLAIMED
+    assert run(other.claim("r1", 100.0)) == PENDING
+
+
+def test_sent_run_is_not_claimed_again(run):
+    journal = DeliveryJournal(redis_client)
+    run(journal.claim("r1", 100.0))
+    run(journal.complete("r1", 100.0, SENT))
+
+    assert run(journal.claim("r1", 100.0)) == SENT
+
+
+def test_failed_run_can_be_claimed_by_a_retry(run):
+    journal = DeliveryJournal(redis_client)
+    run(journal.claim("r1", 100.0))
+    run(journal.complete("r1", 100.0, "retry", "boom"))
+
+    assert run(journal.claim("r1", 100.0)) == CLAIMED
+
+
+def test_renew_extends_the_leases_of_held_runs(run):
+    journal = DeliveryJournal(redis_client, lease=1)
+    run(journal.claim_many([("r1", 100.0), ("r2", 100.0)]))
+    run(journal.complete("r2", 100.0, SENT))
+
+    journal.lease_ms = 60_000
+    assert run(journal.renew()) == 1
+    assert pttl(run, "r1", 100.0) > 1000
+
+
+def test_renew_does_not_touch_a_run_finished_elsewhere(run):
+    journal = DeliveryJournal(redis_client, lease=60)
+    run(journal.claim("r1", 100.0))
+    # lease истёк, запуск забрал и отправил другой воркер
+    run(redis_client.set(fire_key("r1", 100.0), SENT, ex=100))
+
+    assert run(journal.renew()) == 0
+    assert run(redis_client.get(fire_key("r1", 100.0))) == SENT
+    assert pttl(run, "r1", 100.0) <= 100_000
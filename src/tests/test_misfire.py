@@ -0,0 +1,24 @@
+from scheduler.misfire import CatchUpPolicy
+
+
+def test_notices_are_spaced_by_rate():
+    policy = CatchUpPolicy(grace=60, rate=5)
+
+    assert policy.slots(3, now=100.0) == [100.0, 100.2, 100.4]
+
+
+def test_next_batch_queues_behind_the_backlog():
+    policy = CatchUpPolicy(grace=60, rate=5)
+    first = policy.slots(1000, now=100.0)
+    second = policy.slots(1000, now=100.0, last=first[-1])
+
+    slots = first + second
+    assert second[0] > first[-1]
+    # не больше rate уведомлений в любую секунду
+    assert all(later - earlier >= 0.2 - 1e-9 for earlier, later in zip(slots, slots[1:]))
+
+
+def test_backlog_in_the_past_starts_now():
+    policy = CatchUpPolicy(grace=60, rate=5)
+
+    assert policy.slots(1, now=100.0, last=50.0) == [100.0]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from storage import redis_client
+from storage.repository import SCHEDULE_KEY, ReminderRepository
+
+
+def record(user_id: int = 1, run_at: str = "2030-01-01T10:00:00+00:00", **fields) -> dict:
+    return {
+        "user_id": str(user_id),
+        "text": "t",
+        "type": "once",
+        "run_at": run_at,
+        "status": "active",
+        "tz": "UTC",
+        **fields,
+    }
+
+
+@pytest.fixture(params=["hash", "packed"])
+def repo(request):
+    return ReminderRepository(redis_client, encoding=request.param)
+
+
+def test_create_stops_at_the_cap(run, repo):
+    assert run(repo.create(record(), 1.0, limit=2))
+    assert run(repo.create(record(), 2.0, limit=2))
+
+    assert run(repo.create(record(), 3.0, limit=2)) is None
+    assert run(repo.count(1)) == 2
+    assert run(redis_client.zcard(SCHEDULE_KEY)) == 2
+
+
+def test_parallel_creates_do_not_overshoot_the_cap(run, repo):
+    async def create_together():
+        return await asyncio.gather(*(repo.create(record(), float(i), limit=5) for i in range(20)))
+
+    created = [rid for rid in run(create_together()) if rid]
+
+    assert len(created) == 5
+    assert run(repo.count(1)) == 5
+
+
+def test_create_many_keeps_the_cap(run, repo):
+    run(repo.create(record(), 1.0))
+    items = [(record(), float(i), []) for i in range(5)]
+
+    created = run(repo.create_many(items, limit=3))
+
+    assert len(created) == 2
+    assert run(repo.count(1)) == 3
+
+
+def test_claim_moves_the_entry_once(run, repo):
+    rid = run(repo.create(record(type="daily"), 100.0))
+
+    assert run(repo.claim_due([(rid, 100.0, 200.0)])) == [rid]
+    # второй диспетчер прочитал тот же бакет — запись уже не его
+    assert run(repo.claim_due([(rid, 100.0, 200.0)])) == []
+    assert run(repo.next_runs([rid]))[0] == 200.0
+
+
+def test_claim_takes_one_off_reminders_off_the_schedule(run, repo):
+    rid = run(repo.create(record(), 100.0))
+
+    assert run(repo.claim_due([(rid, 100.0, None)])) == [rid]
+    assert run(repo.next_runs([rid]))[0] is None
+
+
+def test_retire_deletes_the_fired_run(run, repo):
+    rid = run(repo.create(record(), 100.0))
+    run(repo.claim_due([(rid, 100.0, None)]))
+
+    assert run(repo.retire(rid, "2030-01-01T10:00:00+00:00")) == 1
+    assert not run(repo.get(rid))
+    assert run(repo.count(1)) == 0
+
+
+def test_retire_keeps_a_reminder_rescheduled_meanwhile(run, repo):
+    rid = run(repo.create(record(), 100.0))
+    run(repo.claim_due([(rid, 100.0, None)]))
+    # пока шла отправка, пользователь перенёс напоминание
+    assert run(repo.reschedule(rid, {"run_at": "2030-02-01T10:00:00+00:00"}, 500.0))
+
+    assert run(repo.retire(rid, "2030-01-01T10:00:00+00:00")) is None
+    assert run(repo.get(rid))["run_at"] == "2030-02-01T10:00:00+00:00"
+    assert run(repo.next_runs([rid]))[0] == 500.0
+
+
+def test_retire_keeps_a_reminder_back_on_the_schedule(run, repo):
+    rid = run(repo.create(record(), 100.0))
+
+    # запись не снята с расписания — запуск не последний
+    assert run(repo.retire(rid, "2030-01-01T10:00:00+00:00")) is None
+    assert run(repo.get(rid))
+
+
+def test_reschedule_keeps_the_id_and_moves_the_score(run, repo):
+    rid = run(repo.create(record(), 100.0))
+
+    assert run(repo.reschedule(rid, {"type": "daily"}, 300.0))
+
+    data = run(repo.get(rid))
+    assert data["type"] == "daily"
+    assert data["text"] == "t"
+    assert run(repo.next_runs([rid]))[0] == 300.0
+
+
+def test_reschedule_of_a_deleted_reminder_does_not_arm_it(run, repo):
+    rid = run(repo.create(record(), 100.0))
+    run(repo.delete(rid))
+
+    assert not run(repo.reschedule(rid, {"type": "daily"}, 300.0))
+    assert run(repo.next_runs([rid]))[0] is None
@@ -0,0 +1,29 @@
+from bot.throttling import ALLOWED, REJECTED, SILENT, RateLimiter
+from storage import redis_client
+
+
+def test_user_is_warned_once_per_window(run):
+    limiter = RateLimiter(redis_client, {"create": (2, 60)})
+
+    hits = [run(limiter.hit("create", 1, now=600.0)) for _ in range(4)]
+
+    assert hits == [ALLOWED, ALLOWED, REJECTED, SILENT]
+
+
+def test_rejected_hits_are_not_counted(run):
+    limiter = RateLimiter(redis_client, {"create": (2, 60)})
+    for _ in range(5):
+        run(limiter.hit("create", 1, now=600.0))
+
+    # через полтора окна от прошлого осталась половина: 2 * 0.5 < 2
+    assert run(limiter.hit("create", 1, now=690.0)) == ALLOWED
+    assert run(limiter.hit("create", 1, now=690.0)) != ALLOWED
+
+
+def test_users_and_actions_are_limited_separately(run):
+    limiter = RateLimiter(redis_client, {"create": (1, 60), "list": (1, 60)})
+
+    assert run(limiter.hit("create", 1, now=600.0)) == ALLOWED
+    assert run(limiter.hit("create", 2, now=600.0)) == ALLOWED
+    assert run(limiter.hit("list", 1, now=600.0)) == ALLOWED
+    assert run(limiter.hit("create", 1, now=600.0)) == REJECTED